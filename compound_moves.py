@@ -0,0 +1,267 @@
+from swap import swap_move_compute_helper, swap_move_is_feasible, swap_extended
+from room_matching import reassign_rooms
+
+# Compound moves: Kempe chains and ejection chains. They are applied to the
+# solution directly and evaluated incrementally through its running costs
+# and feasibility counters; a rejected move is undone through the undo log
+# (under a savepoint if a transaction is already open).
+
+def period_lectures(sol, d, s):
+    lectures = []
+    for r in range(sol.R):
+        l = sol.lecture_at(r, d, s)
+        if l >= 0:
+            lectures.append(l)
+    return lectures
+
+def _free_room(sol, d, s):
+    for r in range(sol.R):
+        if sol.lecture_at(r, d, s) < 0:
+            return r
+    return -1
+
+def apply_compound(sol, apply, strategy):
+    """
+    Run apply(), which returns False if the move cannot be made, and keep its
+    changes only if the solution is feasible afterwards and, for the
+    'if_better' strategies, if the cost decreased.
+    """
+    own_transaction = sol.undo_log is None
+    if own_transaction:
+        sol.begin()
+    savepoint = sol.savepoint()
+    cost_before = sol.total_cost()
+
+    applied = apply() and sol.is_feasible()
+    if applied and strategy in ('if_better', 'if_feasible_and_better'):
+        applied = sol.total_cost() < cost_before
+
+    if not applied:
+        sol.rollback(savepoint)
+    if own_transaction:
+        sol.commit()
+    return applied
+
+def kempe_chain(sol, l, d2, s2):
+    """
+    Kempe chain of lecture l towards the period (d2, s2): the connected
+    component of l in the course conflict graph restricted to the lectures
+    of its period and of (d2, s2). Exchanging the periods of the whole chain
+    keeps the teacher and curriculum constraints satisfied.
+
+    Returns:
+        (lectures leaving the period of l, lectures leaving (d2, s2))
+    """
+    model = sol.model
+    conflicts = model.course_conflicts_view
+    lecture_course = model.lecture_course_view
+    d1, s1 = sol.lecture_d_view[l], sol.lecture_s_view[l]
+
+    sides = (period_lectures(sol, d1, s1), period_lectures(sol, d2, s2))
+    chain = ([l], [])
+    in_chain = {l}
+    frontier = [(l, 0)]
+    while frontier:
+        a, side = frontier.pop()
+        c = lecture_course[a]
+        other = 1 - side
+        for b in sides[other]:
+            if b not in in_chain and conflicts[c, lecture_course[b]]:
+                in_chain.add(b)
+                chain[other].append(b)
+                frontier.append((b, other))
+    return chain
+
+def kempe_chain_extended(sol, l, d2, s2, strategy='if_feasible_and_better'):
+    """
+    Exchange the periods of the Kempe chain of l between its period and
+    (d2, s2), then re-assign the rooms of both periods optimally.
+
+    Returns:
+        True if the move was applied
+    """
+    d1, s1 = sol.lecture_d_view[l], sol.lecture_s_view[l]
+    if d1 < 0 or (d1 == d2 and s1 == s2):
+        return False
+
+    def apply():
+        model = sol.model
+        available = model.availability_view
+        lecture_course = model.lecture_course_view
+        out1, out2 = kempe_chain(sol, l, d2, s2)
+
+        # Availabilities and room capacity of both periods
+        for a in out1:
+            if not available[lecture_course[a], d2, s2]:
+                return False
+        for b in out2:
+            if not available[lecture_course[b], d1, s1]:
+                return False
+        n1 = len(period_lectures(sol, d1, s1))
+        n2 = len(period_lectures(sol, d2, s2))
+        if n1 - len(out1) + len(out2) > sol.R or n2 - len(out2) + len(out1) > sol.R:
+            return False
+
+        for a in out1 + out2:
+            sol.unassign_lecture(a)
+        for a in out1:
+            sol.assign_lecture(a, _free_room(sol, d2, s2), d2, s2)
+        for b in out2:
+            sol.assign_lecture(b, _free_room(sol, d1, s1), d1, s1)
+        reassign_rooms(sol, [(d1, s1), (d2, s2)])
+        return True
+
+    return apply_compound(sol, apply, strategy)
+
+def blockers(sol, l, r, d, s):
+    # Lectures preventing l from taking (r, d, s): the occupant of the cell
+    # and the lectures of conflicting courses in the period
+    model = sol.model
+    conflicts = model.course_conflicts_view
+    lecture_course = model.lecture_course_view
+    c = lecture_course[l]
+    found = []
+    for r2 in range(sol.R):
+        b = sol.lecture_at(r2, d, s)
+        if b >= 0 and b != l and (r2 == r or conflicts[c, lecture_course[b]]):
+            found.append(b)
+    return found
+
+def best_insertion(sol, l):
+    """
+    Cheapest cell where the unassigned lecture l can go without ejecting
+    anything, as (r, d, s), or None. In each conflict-free period the free
+    room with the smallest capacity excess is evaluated.
+    """
+    model = sol.model
+    c = model.lecture_course_view[l]
+    t = model.course_teacher_view[c]
+    curricula = model.course_curricula[c]
+    available = model.availability_view
+    excess = model.capacity_excess_view
+    sum_tds = sol.sum_tds_view
+    sum_qds = sol.sum_qds_view
+
+    # The trial assignments below are undone at once: keep them out of the
+    # undo log
+    undo_log = sol.undo_log
+    sol.undo_log = None
+    best, best_cost = None, None
+    for d in range(sol.D):
+        for s in range(sol.S):
+            if not available[c, d, s] or sum_tds[t, d, s]:
+                continue
+            if any(sum_qds[q, d, s] for q in curricula):
+                continue
+            rooms = [r for r in range(sol.R) if sol.lecture_at(r, d, s) < 0]
+            if not rooms:
+                continue
+            r = min(rooms, key=lambda r: excess[c, r])
+            sol.assign_lecture(l, r, d, s)
+            cost = sol.total_cost()
+            sol.unassign_lecture(l)
+            if best_cost is None or cost < best_cost:
+                best, best_cost = (r, d, s), cost
+    sol.undo_log = undo_log
+    return best
+
+def _least_blocked_cell(sol, l, moved):
+    """
+    Available cell for l that ejects the fewest lectures, never one already
+    moved by the chain, as (r, d, s), or None. Free rooms are preferred, then
+    rooms held by lectures that are ejected anyway, then the best fitting room.
+    """
+    model = sol.model
+    conflicts = model.course_conflicts_view
+    lecture_course = model.lecture_course_view
+    available = model.availability_view
+    excess = model.capacity_excess_view
+    c = lecture_course[l]
+
+    best, best_count = None, None
+    for d in range(sol.D):
+        for s in range(sol.S):
+            if not available[c, d, s]:
+                continue
+            occupants = [sol.lecture_at(r, d, s) for r in range(sol.R)]
+            conflicting = {b for b in occupants if b >= 0 and conflicts[c, lecture_course[b]]}
+            if conflicting & moved:
+                continue
+            free = [r for r, b in enumerate(occupants) if b < 0 or b in conflicting]
+            if free:
+                r = min(free, key=lambda r: excess[c, r])
+                count = len(conflicting)
+            else:
+                r = min((r for r in range(sol.R) if occupants[r] not in moved),
+                        key=lambda r: excess[c, r], default=-1)
+                if r < 0:
+                    continue
+                count = len(conflicting) + 1
+            if best_count is None or count < best_count:
+                best, best_count = (r, d, s), count
+    return best
+
+def ejection_chain_extended(sol, l, r2, d2, s2, max_ejections=3, strategy='if_feasible_and_better'):
+    """
+    Move l to (r2, d2, s2), ejecting the lectures in its way. Each ejected
+    lecture goes to its cheapest free conflict-free cell or, if there is
+    none, to the cell where it ejects the fewest other lectures, up to
+    max_ejections times.
+
+    Returns:
+        True if the move was applied
+    """
+    if sol.lecture_r_view[l] < 0:
+        return False
+    if (sol.lecture_r_view[l], sol.lecture_d_view[l], sol.lecture_s_view[l]) == (r2, d2, s2):
+        return False
+    if not sol.model.availability_view[sol.model.lecture_course_view[l], d2, s2]:
+        return False
+
+    def apply():
+        moved = set()
+        queue = []
+
+        def place(a, r, d, s):
+            for b in blockers(sol, a, r, d, s):
+                sol.unassign_lecture(b)
+                queue.append(b)
+            sol.assign_lecture(a, r, d, s)
+            moved.add(a)
+
+        sol.unassign_lecture(l)
+        place(l, r2, d2, s2)
+        n_ejections = 0
+        while queue:
+            e = queue.pop()
+            cell = best_insertion(sol, e)
+            if cell is not None:
+                sol.assign_lecture(e, *cell)
+                moved.add(e)
+                continue
+
+            n_ejections += 1
+            if n_ejections > max_ejections:
+                return False
+            cell = _least_blocked_cell(sol, e, moved)
+            if cell is None:
+                return False
+            place(e, *cell)
+        return True
+
+    return apply_compound(sol, apply, strategy)
+
+def compound_move_extended(sol, mv, strategy='if_feasible_and_better'):
+    """
+    Apply the swap move mv or, if the swap is infeasible, the Kempe chain of
+    its lecture towards its target period, or else the ejection chain to its
+    target cell.
+
+    Returns:
+        True if one of the moves was applied
+    """
+    swap_move_compute_helper(sol, mv)
+    if swap_move_is_feasible(sol, mv):
+        return swap_extended(sol, mv, strategy=strategy)
+    return (kempe_chain_extended(sol, mv.l1, mv.d2, mv.s2, strategy=strategy) or
+            ejection_chain_extended(sol, mv.l1, mv.r2, mv.d2, mv.s2, strategy=strategy))
@@ -10,5 +10,44 @@ R_CLOUD = 1
 TIME = 400
 GD_ITER = 50
 
+# Island model (used when NUM_SWARMS > 1): evaluations each island runs
+# between two migrations, and number of elite individuals it sends
+MIGRATION_INTERVAL = 500
+MIGRANTS = 2
+
+# Processes of the parallel multi-start construction (1: serial find). When
+# parallel, the initial population is made of the POPULATION_SIZE best
+# independent feasible solutions instead of perturbed copies of one
+FINDER_PROCESSES = 1
+
+# Probability of drawing the lecture of a move among the lectures that
+# contribute to the soft cost
+SAMPLER_BIAS = 0.0
+
+# Master seed of the random streams
+SEED = 0
+
+# Search engine: 'growth_optimizer', 'simulated_annealing', 'tabu_search' or
+# 'portfolio' (all of them in time slices of PORTFOLIO_SLICE seconds, given
+# to the most productive method)
+METHOD = 'growth_optimizer'
+PORTFOLIO_SLICE = 2.0
+
+# Entries of the LRU cache of evaluated solutions (by Zobrist hash), used by
+# the growth optimizer to skip duplicate children
+FITNESS_CACHE_SIZE = 10000
+
+# Reject children that duplicate (by Zobrist hash) another individual of the
+# population, to keep large populations diverse
+DIVERSITY_REPLACEMENT = False
+
+# Mean pairwise distance between the individuals (fraction of the lectures
+# assigned differently) below which the worst half of the population is
+# restarted (0: never)
+MIN_DIVERSITY = 0.0
+
+# Check the running cost against a full recomputation after every evaluation
+AUDIT_COST = False
+
 INPUT = f'mnt/data/{COMP}.ctt'
 OUTPUT = f'mnt/data/{COMP}.out'
\ No newline at end of file
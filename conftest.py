@@ -0,0 +1,2 @@
+# The modules live at the top level of the repository: this conftest puts it
+# on sys.path, so that plain `pytest` finds them as `python -m pytest` does.
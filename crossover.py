@@ -0,0 +1,60 @@
+from compound_moves import apply_compound, blockers, best_insertion
+
+# Crossover by transplanting blocks of courses: every lecture of the block
+# takes its cell in the reference solution at once, the lectures in the way
+# are ejected and re-inserted by a repair step, and the result is evaluated
+# through the running costs of the solution.
+
+def transplant(sol, ref, courses, strategy='if_feasible'):
+    """
+    Give the lectures of the courses their cells in ref. Lectures of other
+    courses occupying those cells, or conflicting with the block in its
+    periods, are ejected and re-inserted at their cheapest free conflict-free
+    cell (found through the occupancy counters); the move is undone if one of
+    them does not fit.
+
+    Args:
+        sol: Solution to modify in place
+        ref: Feasible reference solution of the same model
+        courses: Indices of the courses of the block
+        strategy: 'if_feasible' or 'if_feasible_and_better'
+
+    Returns:
+        True if the block was transplanted
+    """
+    if ref is sol:
+        return False
+    model = sol.model
+    block = [(l, ref.lecture_r_view[l], ref.lecture_d_view[l], ref.lecture_s_view[l])
+             for c in courses for l in model.course_lectures[c] if ref.lecture_r_view[l] >= 0]
+    if not block:
+        return False
+
+    def apply():
+        # The block is feasible in ref, so its lectures never block each other
+        for l, r, d, s in block:
+            sol.unassign_lecture(l)
+        displaced = []
+        for l, r, d, s in block:
+            for b in blockers(sol, l, r, d, s):
+                sol.unassign_lecture(b)
+                displaced.append(b)
+            sol.assign_lecture(l, r, d, s)
+
+        # Repair
+        for b in displaced:
+            cell = best_insertion(sol, b)
+            if cell is None:
+                return False
+            sol.assign_lecture(b, *cell)
+        return True
+
+    return apply_compound(sol, apply, strategy)
+
+def curriculum_crossover(sol, ref, q, strategy='if_feasible'):
+    # Transplant the timetable of curriculum q from ref
+    return transplant(sol, ref, sol.model.curriculum_courses[q], strategy=strategy)
+
+def course_crossover(sol, ref, c, strategy='if_feasible'):
+    # Transplant the timetable of course c from ref
+    return transplant(sol, ref, [c], strategy=strategy)
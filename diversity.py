@@ -0,0 +1,46 @@
+import numpy as np
+from collections import namedtuple
+
+# distance: mean pairwise Hamming distance between the (room, day, slot)
+# assignments of the individuals, as a fraction of the lectures
+# entropy: mean entropy (in bits) of the cell of each lecture across the population
+# unique: number of distinct individuals (by Zobrist hash)
+PopulationDiversity = namedtuple('PopulationDiversity', ['distance', 'entropy', 'unique'])
+
+def population_diversity(population):
+    """
+    Diversity metrics of a population, vectorized over the stacked cells of
+    the lectures of all the individuals. The pairwise Hamming distance is
+    derived from the per-lecture frequency of each cell: the pairs of
+    individuals that disagree on lecture l are (P^2 - sum of the squared
+    counts of its cells) / 2, so the cost is O(P L) instead of O(P^2 L).
+
+    Args:
+        population: List of Solutions of the same model
+
+    Returns:
+        PopulationDiversity
+    """
+    P = len(population)
+    if P < 2:
+        return PopulationDiversity(0.0, 0.0, P)
+    first = population[0]
+    L = first.L
+    n_cells = first.R * first.D * first.S + 1
+
+    # Cell of each lecture of each individual, n_cells - 1 for unassigned
+    r = np.stack([solution.lecture_r for solution in population]).astype(np.int64)
+    d = np.stack([solution.lecture_d for solution in population])
+    s = np.stack([solution.lecture_s for solution in population])
+    cells = np.where(r >= 0, (r * first.D + d) * first.S + s, n_cells - 1)
+
+    # Frequency of each (lecture, cell)
+    counts = np.bincount((np.arange(L) * n_cells + cells).ravel(), minlength=L * n_cells)
+    counts = counts[counts > 0]
+
+    disagreeing_pairs = (L * P * P - np.sum(counts * counts)) / 2
+    distance = disagreeing_pairs / (P * (P - 1) / 2) / L
+    p = counts / P
+    entropy = -np.sum(p * np.log2(p)) / L
+    unique = len({solution.zobrist for solution in population})
+    return PopulationDiversity(float(distance), float(entropy), unique)
@@ -0,0 +1,94 @@
+import heapq
+from collections import Counter
+
+class EliteArchive:
+    """
+    Fitness of the individuals 0..n-1 of a population, ordered by two heaps
+    (best first and worst first) with lazy deletion, so that replacing an
+    individual costs O(log n) and the best, worst, top-k and bottom-k views
+    stay current without sorting the population. Ties are ordered by index,
+    as a stable sort of the population would.
+
+    With the Zobrist hashes of the individuals, the archive also counts them,
+    for diversity-aware replacement.
+    """
+    def __init__(self, fitness, hashes=None):
+        n = len(fitness)
+        self.fitness = list(fitness)
+        self.version = [0] * n
+        self._best = [(f, i, 0) for i, f in enumerate(self.fitness)]
+        self._worst = [(-f, -i, 0) for i, f in enumerate(self.fitness)]
+        heapq.heapify(self._best)
+        heapq.heapify(self._worst)
+        self.hashes = list(hashes) if hashes is not None else None
+        self.hash_count = Counter(self.hashes) if hashes is not None else None
+
+    def __len__(self):
+        return len(self.fitness)
+
+    def update(self, i, fitness, zobrist=None):
+        # Replace individual i; its old heap entries become stale
+        self.fitness[i] = fitness
+        self.version[i] += 1
+        v = self.version[i]
+        heapq.heappush(self._best, (fitness, i, v))
+        heapq.heappush(self._worst, (-fitness, -i, v))
+        if self.hashes is not None and zobrist is not None:
+            self.hash_count[self.hashes[i]] -= 1
+            self.hash_count[zobrist] += 1
+            self.hashes[i] = zobrist
+        if len(self._best) > 4 * len(self.fitness):
+            self._rebuild()
+
+    def _rebuild(self):
+        # Drop the stale entries
+        self._best = [(f, i, self.version[i]) for i, f in enumerate(self.fitness)]
+        self._worst = [(-f, -i, self.version[i]) for i, f in enumerate(self.fitness)]
+        heapq.heapify(self._best)
+        heapq.heapify(self._worst)
+
+    def _clean(self, heap, sign):
+        # Pop the stale entries at the top of heap
+        while True:
+            f, i, v = heap[0]
+            if v == self.version[sign * i]:
+                return
+            heapq.heappop(heap)
+
+    def _first(self, heap, sign, k):
+        # k first valid entries of heap, in order, as individual indices
+        entries = []
+        while heap and len(entries) < k:
+            self._clean(heap, sign)
+            entries.append(heapq.heappop(heap))
+        for entry in entries:
+            heapq.heappush(heap, entry)
+        return [sign * i for f, i, v in entries]
+
+    def best(self):
+        self._clean(self._best, 1)
+        return self._best[0][1]
+
+    def worst(self):
+        self._clean(self._worst, -1)
+        return -self._worst[0][1]
+
+    def best_fitness(self):
+        return self.fitness[self.best()]
+
+    def worst_fitness(self):
+        return self.fitness[self.worst()]
+
+    def top(self, k):
+        # Indices of the k best individuals, best first
+        return self._first(self._best, 1, min(k, len(self.fitness)))
+
+    def bottom(self, k):
+        # Indices of the k worst individuals, worst first
+        return self._first(self._worst, -1, min(k, len(self.fitness)))
+
+    def is_duplicate(self, zobrist, i):
+        # Whether an individual other than i has the hash zobrist
+        if self.hashes is None:
+            return False
+        return self.hash_count[zobrist] - (self.hashes[i] == zobrist) > 0
@@ -1,10 +1,35 @@
 import math
+import os
 import random
+import threading
+import numpy as np
 from collections import defaultdict
+from multiprocessing import Pool
+from solution import Solution
+
+# State of a worker process of find_parallel, set up once by _init_worker
+_worker = {}
+
+def _init_worker(model, config):
+    _worker['model'] = model
+    _worker['config'] = config
+
+def _find_attempt(seed):
+    # One randomized attempt: the assignments and cost of the solution found, or None
+    random.seed(seed)
+    solution = Solution(_worker['model'])
+    if not FeasibleSolutionFinder().try_find(_worker['config'], solution):
+        return None
+    return solution.export_assignments(), solution.total_cost()
 
 class FeasibleSolutionFinderConfig:
-    def __init__(self, ranking_randomness=0.33):
+    def __init__(self, ranking_randomness=0.33, strategy='dsatur', max_ejections=None):
         self.ranking_randomness = ranking_randomness
+        # 'dsatur': bitset constructive with dynamic ordering and ejections
+        # 'greedy': static difficulty order, first free cell, restart on failure
+        self.strategy = strategy
+        # Ejections allowed per trial of the 'dsatur' strategy (default: 10 per lecture)
+        self.max_ejections = max_ejections
 
 
 class FeasibleSolutionFinder:
@@ -15,27 +40,27 @@ class FeasibleSolutionFinder:
         self.error = None
 
     def get_course_difficulty(self, model):
+        n_courses_of_teacher = np.bincount(model.course_teacher, minlength=len(model.teachers))
+        n_unavailabilities = np.sum(~model.availability_cds, axis=(1, 2))
+
         difficulty = [0] * len(model.courses)
         for course in model.courses:
             c = course.index
-            t = course.teacher.index
-
-            n_curriculas = len(model.curriculas_of_course[course.id])
-            n_teacher_courses = len(model.courses_of_teacher[course.teacher.id])
-            n_unavailabilities = sum(
-                not model.is_available(course.id, d, s)
-                for d in range(model.n_days)
-                for s in range(model.n_slots)
-            )
-
-            difficulty[c] = (
-                n_curriculas +
-                n_teacher_courses +
-                n_unavailabilities
+            t = model.course_teacher[c]
+
+            difficulty[c] = int(
+                len(model.course_curricula[c]) +
+                n_courses_of_teacher[t] +
+                n_unavailabilities[c]
             ) * max(1, course.n_lectures)
         return difficulty
 
     def try_find(self, config, solution):
+        if config.strategy == 'dsatur':
+            return self.try_find_dsatur(config, solution)
+        return self.try_find_greedy(config, solution)
+
+    def try_find_greedy(self, config, solution):
         self.reset()
         model = solution.model
         C, R, D, S = len(model.courses), len(model.rooms), model.n_days, model.n_slots
@@ -55,14 +80,16 @@ class FeasibleSolutionFinder:
         teacher_busy = [[[False]*S for _ in range(D)] for _ in range(T)]
         curriculum_used = [[[False]*S for _ in range(D)] for _ in range(Q)]
 
+        available = model.availability_view
+
         n_assignments = 0
         n_attempts = 0
 
         for _, lecture in assignments:
             c = lecture.course
             c_idx = c.index
-            t_idx = c.teacher.index
-            curriculas = model.curriculas_of_course[c.id]
+            t_idx = model.course_teacher_view[c_idx]
+            curriculas = model.course_curricula[c_idx]
 
             assigned = False
             for r_idx, room in enumerate(model.rooms):
@@ -73,9 +100,9 @@ class FeasibleSolutionFinder:
                             continue
                         if teacher_busy[t_idx][d][s]:
                             continue
-                        if any(curriculum_used[model.curricula_by_id[q].index][d][s] for q in curriculas):
+                        if any(curriculum_used[q][d][s] for q in curriculas):
                             continue
-                        if not model.is_available(c.id, d, s):
+                        if not available[c_idx, d, s]:
                             continue
 
                         solution.assign_lecture(lecture.index, r_idx, d, s)
@@ -83,8 +110,7 @@ class FeasibleSolutionFinder:
                         room_used[r_idx][d][s] = True
                         teacher_busy[t_idx][d][s] = True
                         for q in curriculas:
-                            q_idx = model.curricula_by_id[q].index
-                            curriculum_used[q_idx][d][s] = True
+                            curriculum_used[q][d][s] = True
 
                         n_assignments += 1
                         assigned = True
@@ -98,6 +124,147 @@ class FeasibleSolutionFinder:
 
         return True
 
+    def try_find_dsatur(self, config, solution):
+        """
+        DSATUR-style construction on period bitmasks (bit d * S + s).
+
+        For each course the periods blocked by placed lectures of conflicting
+        courses (same teacher or shared curriculum) are kept as a bitmask,
+        updated incrementally on every placement and ejection. At each step a
+        lecture of the course with the fewest feasible periods is placed in the
+        period that removes the fewest options from the other courses. When a
+        course has no feasible period left, the lectures blocking its least
+        blocked period are ejected and queued again, up to max_ejections.
+        """
+        self.reset()
+        model = solution.model
+        C, R, D, S = len(model.courses), len(model.rooms), model.n_days, model.n_slots
+        P = D * S
+
+        course_difficulty = self.get_course_difficulty(model)
+        lecture_course = model.lecture_course_view
+        conflicts = model.course_conflicts_view
+        excess = model.capacity_excess_view
+        capacity = model.room_capacity.tolist()
+        neighbours = [np.flatnonzero(model.course_conflicts[c]).tolist() for c in range(C)]
+
+        allowed = [0] * C
+        for c, periods in enumerate(model.availability_cds.reshape(C, P).tolist()):
+            for p, available in enumerate(periods):
+                if available:
+                    allowed[c] |= 1 << p
+
+        # Number of placed lectures of conflicting courses in each period, and
+        # the matching bitmask of blocked periods
+        block_count = [[0] * P for _ in range(C)]
+        blocked = [0] * C
+        # Free rooms of each period as a bitmask, and periods with no free room
+        room_free = [(1 << R) - 1] * P
+        full = 0
+
+        remaining = [[] for _ in range(C)]
+        for l in range(len(model.lectures)):
+            remaining[lecture_course[l]].append(l)
+        max_ejections = config.max_ejections
+        if max_ejections is None:
+            max_ejections = 10 * len(model.lectures)
+
+        def feasible_periods(c):
+            return allowed[c] & ~blocked[c] & ~full
+
+        def place(l, c, p, r):
+            nonlocal full
+            solution.assign_lecture(l, r, p // S, p % S)
+            bit = 1 << p
+            for c2 in neighbours[c]:
+                count = block_count[c2]
+                count[p] += 1
+                if count[p] == 1:
+                    blocked[c2] |= bit
+            room_free[p] &= ~(1 << r)
+            if not room_free[p]:
+                full |= bit
+
+        def eject(l):
+            nonlocal full
+            r, d, s = solution.lecture_r_view[l], solution.lecture_d_view[l], solution.lecture_s_view[l]
+            p = d * S + s
+            c = lecture_course[l]
+            solution.unassign_lecture(l)
+            bit = 1 << p
+            for c2 in neighbours[c]:
+                count = block_count[c2]
+                count[p] -= 1
+                if count[p] == 0:
+                    blocked[c2] &= ~bit
+            room_free[p] |= 1 << r
+            full &= ~bit
+            remaining[c].append(l)
+
+        def best_room(c, p):
+            free = room_free[p]
+            return min((r for r in range(R) if free >> r & 1),
+                       key=lambda r: (excess[c, r], capacity[r]))
+
+        n_ejections = 0
+        pending = [c for c in range(C) if remaining[c]]
+        while pending:
+            # Most constrained course first, ties broken by a randomized difficulty
+            c = min(pending, key=lambda c: (bin(feasible_periods(c)).count("1"),
+                                            -course_difficulty[c] * random.gauss(1, config.ranking_randomness)))
+            l = remaining[c].pop()
+
+            periods = feasible_periods(c)
+            if periods:
+                # Least constraining period: the one still open to the fewest
+                # pending lectures of conflicting courses
+                best_p, best_key = -1, None
+                for p in range(P):
+                    if not periods >> p & 1:
+                        continue
+                    lost = 0
+                    for c2 in neighbours[c]:
+                        if remaining[c2] and feasible_periods(c2) >> p & 1:
+                            lost += len(remaining[c2])
+                    key = (lost, random.random())
+                    if best_key is None or key < best_key:
+                        best_p, best_key = p, key
+                place(l, c, best_p, best_room(c, best_p))
+            else:
+                n_ejections += 1
+                if n_ejections > max_ejections or not allowed[c]:
+                    self.error = f"Failed to assign lecture {l} (course {model.courses[c].id})"
+                    return False
+
+                # Available period with the fewest blocking lectures
+                best_p, best_key, best_blockers = -1, None, None
+                for p in range(P):
+                    if not allowed[c] >> p & 1:
+                        continue
+                    d, s = divmod(p, S)
+                    blockers = []
+                    for r in range(R):
+                        l2 = solution.lecture_at(r, d, s)
+                        if l2 >= 0 and conflicts[c, lecture_course[l2]]:
+                            blockers.append(l2)
+                    n_blockers = len(blockers) + (not blockers and not room_free[p])
+                    key = (n_blockers, random.random())
+                    if best_key is None or key < best_key:
+                        best_p, best_key, best_blockers = p, key, blockers
+
+                for l2 in best_blockers:
+                    eject(l2)
+                if not room_free[best_p]:
+                    # Still no room: eject the occupant of the best fitting room
+                    d, s = divmod(best_p, S)
+                    r = min(range(R), key=lambda r: (excess[c, r], capacity[r]))
+                    eject(solution.lecture_at(r, d, s))
+                place(l, c, best_p, best_room(c, best_p))
+
+            pending = [c for c in range(C) if remaining[c]]
+
+        return True
+
     def find(self, config, solution, timeout_seconds=None):
         import time
         start_time = time.time()
@@ -110,3 +277,79 @@ class FeasibleSolutionFinder:
             solution.clear()
             trial += 1
         return False
+
+    def find_parallel(self, config, solution, k=1, n_candidates=None, processes=None,
+                      seed=0, timeout_seconds=None):
+        """
+        Run independent randomized attempts in a process pool, each with its
+        own seed, until n_candidates (default k) feasible solutions are found,
+        then cancel the remaining attempts.
+
+        The results are collected per seed index and consumed in seed order:
+        the search ends as soon as the first seeds, in order, have given
+        n_candidates feasible solutions, so the result is reproducible from
+        seed. 2 * processes attempts are kept ahead of the first pending one.
+
+        Returns the k cheapest feasible solutions found, best first, as new
+        Solution objects; the best one is also copied into solution. Returns
+        an empty list if nothing was found within timeout_seconds.
+        """
+        import time
+        start_time = time.time()
+        model = solution.model
+        if n_candidates is None:
+            n_candidates = k
+        if processes is None:
+            processes = os.cpu_count() or 1
+
+        rng = random.Random(seed)
+        # Result (or exception) of the attempt with the i-th seed, stored by
+        # the result thread of the pool
+        results = {}
+        arrived = threading.Condition()
+
+        def collect(index):
+            def callback(result):
+                with arrived:
+                    results[index] = result
+                    arrived.notify()
+            return callback
+
+        found = []
+        pool = Pool(processes, initializer=_init_worker, initargs=(model, config))
+        try:
+            n_submitted = 0
+            n_consumed = 0
+            while len(found) < n_candidates:
+                while n_submitted < n_consumed + 2 * processes:
+                    callback = collect(n_submitted)
+                    pool.apply_async(_find_attempt, (rng.getrandbits(32),),
+                                     callback=callback, error_callback=callback)
+                    n_submitted += 1
+
+                timeout = None
+                if timeout_seconds:
+                    timeout = max(0.0, timeout_seconds - (time.time() - start_time))
+                with arrived:
+                    if not arrived.wait_for(lambda: n_consumed in results, timeout=timeout):
+                        break
+                    result = results.pop(n_consumed)
+                n_consumed += 1
+                if isinstance(result, BaseException):
+                    raise result
+                if result is not None:
+                    found.append(result)
+        finally:
+            # Cancel the attempts still running or queued
+            pool.terminate()
+            pool.join()
+
+        found.sort(key=lambda result: result[1])
+        solutions = []
+        for assignments, cost in found[:k]:
+            found_solution = Solution(model)
+            found_solution.import_assignments(assignments)
+            solutions.append(found_solution)
+        if solutions:
+            solution.copy_from(solutions[0])
+        return solutions
@@ -0,0 +1,42 @@
+from collections import OrderedDict
+
+class FitnessCache:
+    """
+    Bounded LRU cache of the cost of the solutions already evaluated, keyed by
+    their Zobrist hash (Solution.zobrist). A hit means the solution is a
+    duplicate of one seen before.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        # Cost stored for key, or None; a hit makes the entry the most recent
+        cost = self.entries.get(key)
+        if cost is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return cost
+
+    def put(self, key, cost):
+        if self.capacity <= 0:
+            return
+        self.entries[key] = cost
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        # Forget the entries, keep the hit/miss counts
+        self.entries.clear()
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,7 +1,14 @@
 import random
 import math
 import numpy as np
-from swap import SwapMove, swap_predict, swap_extended
+from swap import swap_predict, swap_extended
+from solution import SolutionPool
+from local_search import SwapNeighbourhood, steepest_descent
+from compound_moves import compound_move_extended
+from elite_archive import EliteArchive
+from crossover import transplant
+from diversity import population_diversity
+from feasible_solution_finder import FeasibleSolutionFinder, FeasibleSolutionFinderConfig
 from collections import namedtuple
 import time
 
@@ -22,30 +29,89 @@ class GrowthOptimizerParams:
         self.p2 = p2
         self.p3 = p3
 
-def select_id(popsize, i, k):
+def initial_population(state, pool, popsize):
     """
-    Generate k random integer values within [0, popsize-1] that don't include i and don't repeat
+    Build a population from the current solution of the state
     
     Args:
+        state: Solver state containing the model and solutions
+        pool: SolutionPool the individuals are taken from
         popsize: Population size
-        i: Index to exclude
-        k: Number of unique indices to select
         
     Returns:
-        List of k unique random indices
+        List of popsize solutions
+    """
+    first_solution = pool.acquire()
+    first_solution.copy_from(state.current_solution)
+    population = [first_solution]
+    
+    # Create additional solutions for the population
+    for _ in range(1, popsize):
+        new_solution = first_solution.clone()
+        
+        # Perturb the solution with random swaps
+        for _ in range(10):  # Apply 10 random swaps to create diversity
+            mv = state.generate_swap_move(new_solution)
+            swap_extended(new_solution, mv, strategy='if_feasible')
+        
+        population.append(new_solution)
+    
+    return population
+
+def restart_individual(state, solution, elite):
+    """
+    Replace a stagnating individual, in place: rebuild it with the feasible
+    solution finder or perturb a copy of the elite heavily (also used if the
+    construction fails)
+    
+    Args:
+        state: Solver state containing the model and solutions
+        solution: Individual to replace
+        elite: Solution to perturb
+    """
+    if random.random() < 0.5:
+        solution.clear()
+        if FeasibleSolutionFinder().try_find(FeasibleSolutionFinderConfig(), solution):
+            return
+    
+    solution.copy_from(elite)
+    for _ in range(max(1, state.L // 4)):
+        mv = state.generate_swap_move(solution)
+        swap_extended(solution, mv, strategy='if_feasible')
+
+def evaluate_child(state, solution, parent_hash, cache):
+    """
+    Fitness of a child generated in place from a parent, with duplicates
+    detected in O(1) through the Zobrist hash: a child identical to its parent
+    is re-perturbed with a few random swaps, and the cost of a child already
+    seen is read from the cache instead of being counted as an evaluation.
+    
+    Args:
+        state: Solver state containing the model and solutions
+        solution: Child solution
+        parent_hash: Zobrist hash of the parent
+        cache: FitnessCache
+        
+    Returns:
+        (fitness, evaluated) where evaluated is False for a duplicate
     """
-    if k <= popsize - 1:
-        vec = list(range(0, i)) + list(range(i+1, popsize))
-        r = []
-        for _ in range(k):
-            n = len(vec) - 1
-            t = random.randint(0, n)
-            r.append(vec[t])
-            vec.pop(t)
-        return r
-    return []
+    for _ in range(3):
+        if solution.zobrist != parent_hash:
+            break
+        mv = state.generate_swap_move(solution)
+        swap_extended(solution, mv, strategy='if_feasible')
+    if solution.zobrist == parent_hash:
+        return solution.total_cost(), False
+    
+    fitness = cache.get(solution.zobrist)
+    if fitness is not None:
+        return fitness, False
+    fitness = solution.total_cost()
+    cache.put(solution.zobrist, fitness)
+    return fitness, True
 
-def growth_optimizer(state, params, timeout_callback=None, verbose_callback=None):
+def growth_optimizer(state, params, timeout_callback=None, verbose_callback=None,
+                     population=None, max_fes=None, diversity_callback=None, stagnation=None):
     """
     Implementation of the Growth Optimizer algorithm
     
@@ -54,35 +120,57 @@ def growth_optimizer(state, params, timeout_callback=None, verbose_callback=None
         params: GrowthOptimizerParams instance
         timeout_callback: Function to check if time limit has been reached
         verbose_callback: Function to print progress updates
+        population: Existing population to evolve in place, instead of
+            building one from the current solution
+        max_fes: Number of evaluations to run (defaults to MAX_ITERATIONS)
+        diversity_callback: Function called after every generation with the
+            generation and its PopulationDiversity
+        stagnation: Evaluations since each individual of population last
+            improved, updated in place; a caller that evolves the same
+            population over several calls passes the same list every time,
+            so that the LIMIT restarts see the whole history
     """
     model = state.model
     popsize = state.config.POPULATION_SIZE
     dimension = state.L * 3  # Each lecture has 3 dimensions: room, day, slot
-    max_fes = state.config.MAX_ITERATIONS
+    if max_fes is None:
+        max_fes = state.config.MAX_ITERATIONS
     p1 = params.p1
     p2 = params.p2
     p3 = params.p3
+    audit_cost = state.config.AUDIT_COST
+    gd_iter = state.config.GD_ITER
+    limit = state.config.LIMIT
+    min_diversity = state.config.MIN_DIVERSITY
+    neighbourhood = SwapNeighbourhood(model) if gd_iter > 0 else None
+    cache = state.fitness_cache
+    # Blocks of courses of the crossover: the curricula or, in a model
+    # without curricula, the single courses
+    blocks = model.curriculum_courses or [[c] for c in range(len(model.courses))]
+    block_sizes = [sum(len(model.course_lectures[c]) for c in courses) or 1 for courses in blocks]
     
-    # Initialize population of solutions
-    population = [state.current_solution]
-    fitness = [state.current_cost]
+    # Track evaluation count
+    fes = 0
     
-    # Create additional solutions for the population
-    for _ in range(1, popsize):
-        new_solution = state.current_solution.__class__(model)
-        new_solution.copy_from(state.current_solution)
-        
-        # Perturb the solution with random swaps
-        for _ in range(10):  # Apply 10 random swaps to create diversity
-            mv = state.generate_swap_move()
-            swap_extended(new_solution, mv, strategy='if_feasible')
-        
-        cost = new_solution.compute_total_cost()
-        population.append(new_solution)
-        fitness.append(cost)
+    if population is None:
+        # Individuals live in one preallocated pool, so that cloning is a bulk
+        # buffer copy and never constructs a new Solution
+        pool = SolutionPool(model, popsize)
+        population = initial_population(state, pool, popsize)
+        fes = popsize
+    
+    popsize = len(population)
+    # Fitness of the individuals, ordered by the archive: it is only changed
+    # through archive.update
+    diversity = state.config.DIVERSITY_REPLACEMENT
+    archive = EliteArchive([solution.total_cost() for solution in population],
+                           hashes=[solution.zobrist for solution in population] if diversity else None)
+    fitness = archive.fitness
     
-    # Track best solution and evaluation count
-    fes = popsize
+    # Evaluations since each individual last improved, reported through the state
+    if stagnation is None:
+        stagnation = [0] * popsize
+    state.stagnation = stagnation
     
     # Main optimization loop
     iter_count = 0
@@ -90,44 +178,34 @@ def growth_optimizer(state, params, timeout_callback=None, verbose_callback=None
         if timeout_callback and timeout_callback():
             break
             
-        # Sort population by fitness
-        sorted_indices = sorted(range(len(fitness)), key=lambda i: fitness[i])
-        best_idx = sorted_indices[0]
+        best_idx = archive.best()
+        best_cost_before = state.best_cost
+        fes_before = fes
         
         # Learning phase
         for i in range(popsize):
-            # Select reference solutions
-            worst_idx = sorted_indices[random.randint(popsize - p1, popsize - 1)]
-            better_idx = sorted_indices[random.randint(1, min(p1, popsize - 1))]
+            # Generate new solution through learning, in place inside a transaction:
+            # a rejected child is rolled back in O(moves) instead of being copied
+            new_solution = population[i]
+            parent_hash = new_solution.zobrist
+            new_solution.begin()
             
-            random_indices = select_id(popsize, i, 2)
-            l1 = random_indices[0]
-            l2 = random_indices[1]
-            
-            # Generate new solution through learning
-            new_solution = population[i].__class__(model)
-            new_solution.copy_from(population[i])
+            # Adjust swap probabilities based on fitness
+            sf = fitness[i] / max(archive.worst_fitness(), 1)
             
             # Apply a series of targeted swaps based on the GO algorithm's learning mechanism
             for _ in range(3):  # Apply a few swaps based on learning
-                mv = state.generate_swap_move()
+                mv = state.generate_swap_move(new_solution)
                 
-                # Adjust swap probabilities based on fitness
-                sf = fitness[i] / max(fitness)
                 if random.random() < sf:
-                    swap_extended(new_solution, mv, strategy='if_feasible')
+                    # Falls back to a Kempe or ejection chain when the swap is infeasible
+                    compound_move_extended(new_solution, mv, strategy='if_feasible')
             
             # Evaluate the new solution
-            new_fitness = new_solution.compute_total_cost()
-            fes += 1
-            
-            # Update if better or with probability p2
-            if new_fitness < fitness[i]:
-                fitness[i] = new_fitness
-                population[i] = new_solution
-            elif random.random() < p2 and i != best_idx:
-                fitness[i] = new_fitness
-                population[i] = new_solution
+            new_fitness, evaluated = evaluate_child(state, new_solution, parent_hash, cache)
+            if audit_cost:
+                assert new_solution.audit_cost() == new_fitness
+            fes += evaluated
             
             # Update global best
             if new_fitness < state.best_cost:
@@ -138,53 +216,55 @@ def growth_optimizer(state, params, timeout_callback=None, verbose_callback=None
                     verbose_callback(iter_count, 0, new_fitness, new_fitness,
                                      state.best_cost, 0)
             
+            stagnation[i] = 0 if new_fitness < fitness[i] else stagnation[i] + 1
+            
+            # Update if better or with probability p2
+            if (new_fitness < fitness[i] or (random.random() < p2 and i != best_idx)) and \
+                    not (diversity and archive.is_duplicate(new_solution.zobrist, i)):
+                archive.update(i, new_fitness, new_solution.zobrist)
+                new_solution.commit()
+            else:
+                new_solution.rollback()
+            
             if fes >= max_fes:
                 break
         
         # Reflection phase
         if fes < max_fes:
             for i in range(popsize):
-                new_solution = population[i].__class__(model)
-                new_solution.copy_from(population[i])
+                new_solution = population[i]
+                parent_hash = new_solution.zobrist
+                new_solution.begin()
                 
                 # Apply reflection with probability p3 to some lectures
-                lectures_to_modify = random.sample(range(state.L), max(1, int(state.L * p3)))
+                n_lectures = max(1, int(state.L * p3))
                 
-                for l_idx in lectures_to_modify:
-                    # Get a reference solution from the top p1 solutions
-                    ref_idx = sorted_indices[random.randint(0, min(p1-1, popsize-1))]
-                    ref_solution = population[ref_idx]
-                    
-                    # Create a move that mimics reflection
-                    if population[i].assignments[l_idx] and ref_solution.assignments[l_idx]:
-                        # With some probability, move towards a reference solution's assignment
-                        if random.random() < 0.5:
-                            ref_assignment = ref_solution.assignments[l_idx]
-                            mv = SwapMove(l_idx, ref_assignment.r, ref_assignment.d, ref_assignment.s)
-                            swap_extended(new_solution, mv, strategy='if_feasible')
-                        else:
-                            # Otherwise do a random move
-                            mv = state.generate_swap_move()
-                            swap_extended(new_solution, mv, strategy='if_feasible')
+                # Half of them take their cells in a reference solution from
+                # the top p1 solutions, transplanted in whole blocks
+                ref_solution = population[random.choice(archive.top(p1))]
+                transplanted = 0
+                while transplanted < n_lectures // 2:
+                    b = random.randrange(len(blocks))
+                    transplanted += block_sizes[b]
+                    transplant(new_solution, ref_solution, blocks[b])
+                
+                # The others get a random move
+                for _ in range(n_lectures - n_lectures // 2):
+                    mv = state.generate_swap_move(new_solution)
+                    swap_extended(new_solution, mv, strategy='if_feasible')
                     
                 # Add some randomness with decreasing probability over time
                 af = 0.01 + (0.1 - 0.01) * (1 - fes / max_fes)
                 if random.random() < af:
                     for _ in range(3):  # Do a few completely random swaps
-                        mv = state.generate_swap_move()
+                        mv = state.generate_swap_move(new_solution)
                         swap_extended(new_solution, mv, strategy='if_feasible')
                 
                 # Evaluate the new solution
-                new_fitness = new_solution.compute_total_cost()
-                fes += 1
-                
-                # Update if better or with probability p2
-                if new_fitness < fitness[i]:
-                    fitness[i] = new_fitness
-                    population[i] = new_solution
-                elif random.random() < p2 and i != best_idx:
-                    fitness[i] = new_fitness
-                    population[i] = new_solution
+                new_fitness, evaluated = evaluate_child(state, new_solution, parent_hash, cache)
+                if audit_cost:
+                    assert new_solution.audit_cost() == new_fitness
+                fes += evaluated
                 
                 # Update global best
                 if new_fitness < state.best_cost:
@@ -195,11 +275,92 @@ def growth_optimizer(state, params, timeout_callback=None, verbose_callback=None
                         verbose_callback(iter_count, 0, new_fitness, new_fitness,
                                        state.best_cost, 0)
                 
+                stagnation[i] = 0 if new_fitness < fitness[i] else stagnation[i] + 1
+                
+                # Update if better or with probability p2
+                if (new_fitness < fitness[i] or (random.random() < p2 and i != best_idx)) and \
+                        not (diversity and archive.is_duplicate(new_solution.zobrist, i)):
+                    archive.update(i, new_fitness, new_solution.zobrist)
+                    new_solution.commit()
+                else:
+                    new_solution.rollback()
+                
                 if fes >= max_fes:
                     break
         
+        # A generation of duplicates only still uses up its evaluations, so
+        # that the loop ends without a timeout
+        if fes == fes_before:
+            fes += popsize
+        
+        # Intensification: steepest descent on the top p1 solutions
+        if gd_iter > 0 and fes < max_fes:
+            for i in archive.top(p1):
+                if timeout_callback and timeout_callback():
+                    break
+                
+                # Every round scans the whole neighbourhood: it is charged as
+                # one evaluation, within the remaining budget
+                n_moves, n_rounds = steepest_descent(population[i], neighbourhood, min(gd_iter, max_fes - fes),
+                                                     room_matching=True, timeout_callback=timeout_callback)
+                fes += n_rounds
+                if n_moves > 0:
+                    stagnation[i] = 0
+                archive.update(i, population[i].total_cost(), population[i].zobrist)
+                if audit_cost:
+                    population[i].audit_cost()
+                
+                # Update global best
+                if fitness[i] < state.best_cost:
+                    state.best_cost = fitness[i]
+                    state.best_solution.copy_from(population[i])
+                    
+                    if verbose_callback:
+                        verbose_callback(iter_count, 0, fitness[i], fitness[i],
+                                       state.best_cost, 0)
+        
+        # Diversity of the population, reported through the state and the
+        # callback
+        state.diversity = population_diversity(population)
+        if diversity_callback:
+            diversity_callback(iter_count, state.diversity)
+        converged = state.diversity.distance < min_diversity
+        
+        # Restart the individuals that stopped improving and, if the population
+        # has converged, its worst half, except the best one
+        if limit > 0 or converged:
+            best_idx = archive.best()
+            restarts = {i for i in range(popsize) if limit > 0 and stagnation[i] > limit}
+            if converged:
+                restarts.update(archive.bottom(popsize // 2))
+            restarts.discard(best_idx)
+            for i in sorted(restarts):
+                restart_individual(state, population[i], population[best_idx])
+                archive.update(i, population[i].total_cost(), population[i].zobrist)
+                if audit_cost:
+                    population[i].audit_cost()
+                fes += 1
+                stagnation[i] = 0
+                state.restart_count += 1
+                
+                # Update global best
+                if fitness[i] < state.best_cost:
+                    state.best_cost = fitness[i]
+                    state.best_solution.copy_from(population[i])
+        
+        # Generations without improvement of the global best and of the best
+        # of the population
+        if state.best_cost < best_cost_before:
+            state.non_improving_best_cycles = 0
+        else:
+            state.non_improving_best_cycles += 1
+        if archive.best_fitness() < state.current_cost:
+            state.non_improving_current_cycles = 0
+        else:
+            state.non_improving_current_cycles += 1
+        
         # Update current solution with the best in population
-        best_idx = fitness.index(min(fitness))
+        best_idx = archive.best()
         state.current_solution.copy_from(population[best_idx])
         state.current_cost = fitness[best_idx]
         
@@ -207,7 +368,7 @@ def growth_optimizer(state, params, timeout_callback=None, verbose_callback=None
         
         # Periodic reporting
         if verbose_callback and iter_count % 10 == 0:
-            verbose_callback(iter_count, 0, state.current_cost, min(fitness),
+            verbose_callback(iter_count, state.non_improving_best_cycles, state.current_cost, archive.best_fitness(),
                            state.best_cost, 0)
     
     return state.best_cost
\ No newline at end of file
@@ -1,5 +1,13 @@
-import random
-from swap import SwapMove, swap_predict, swap_extended
+from swap import swap_predict, swap_extended, swap_move_do
+from move_sampler import MoveSampler
+from random_stream import RandomStream
+from fitness_cache import FitnessCache
+
+class SolverStats:
+    """
+    Run statistics, filled in by HeuristicSolverState and the solver methods
+    """
+    pass
 
 class HeuristicSolverState:
     def __init__(self, model, current_solution, best_solution,
@@ -17,6 +25,16 @@ class HeuristicSolverState:
         self.method = method
         self.non_improving_best_cycles = non_improving_best_cycles
         self.non_improving_current_cycles = non_improving_current_cycles
+        # Per-individual stagnation counters of the running optimizer, and
+        # number of individuals restarted because they exceeded LIMIT
+        self.stagnation = []
+        self.restart_count = 0
+        # PopulationDiversity of the last generation of the running optimizer
+        self.diversity = None
+        # Swap moves evaluated by the delta-based engines, and temperature
+        # at the end of the last simulated annealing run
+        self.move_count = 0
+        self.temperature = None
         self._last_log_time = 0
         self.config = config
         self.stats = stats
@@ -26,6 +44,12 @@ class HeuristicSolverState:
         self.D = model.n_days
         self.S = model.n_slots
 
+        # Block random stream of the move generation, reproducible from SEED
+        self.rng = RandomStream(config.SEED if config else None)
+        self.sampler = MoveSampler(model, rng=self.rng, bias=config.SAMPLER_BIAS if config else 0.0)
+        # Costs of the solutions already evaluated, by Zobrist hash
+        self.fitness_cache = FitnessCache(config.FITNESS_CACHE_SIZE if config else 0)
+
         self.methods_name = []
         if self.stats:
             self.stats.methods = []
@@ -37,6 +61,20 @@ class HeuristicSolverState:
             self.stats.cycle_count = 0
             self.stats.best_restored_count = 0
 
+    def add_method(self, name):
+        # Register a solver method and its statistics; returns its index
+        self.methods_name.append(name)
+        if self.stats:
+            self.stats.methods.append({
+                'name': name,
+                'move_count': 0,
+                'improvement_count': 0,
+                'improvement_delta': 0,
+                'time': 0.0,
+            })
+            self.stats.n_methods += 1
+        return len(self.methods_name) - 1
+
     def update_best_solution(self):
         improved = False
         if self.current_cost < self.best_cost:
@@ -61,33 +99,30 @@ class HeuristicSolverState:
     def predict_swap_cost(self, mv, require_feasibility=False):
         return swap_predict(self.current_solution, mv, require_feasibility=require_feasibility, compute_cost=True)
 
-    def apply_swap(self, mv):
-        # Perform the swap and calculate the cost before and after the swap
-        current_cost_before = self.current_solution.compute_total_cost()
-
-        applied = swap_extended(self.current_solution, mv, strategy='always')
+    def apply_swap(self, mv, result=None):
+        # With the SwapResult of predict_swap_cost(mv, require_feasibility=True),
+        # the move is not evaluated a second time
+        if result is not None:
+            applied = result.feasible
+            if applied:
+                swap_move_do(self.current_solution, mv)
+        else:
+            applied = swap_extended(self.current_solution, mv, strategy='always')
 
         if applied:
-            # Calculate the new cost after the swap
-            current_cost_after = self.current_solution.compute_total_cost()
-            # Update the current cost based on the difference between the new and old cost
-            self.current_cost = current_cost_after
+            # The solution keeps its cost components up to date, so this is an O(1) read
+            self.current_cost = self.current_solution.total_cost()
+            if self.config and self.config.AUDIT_COST:
+                self.current_solution.audit_cost()
 
         return applied
 
 
-    def generate_swap_move(self):
-        while True:
-            l1, r2, d2, s2 = generate_random_lecture_slot(self.model)
-            mv = SwapMove(l1, r2, d2, s2)
-            swap_predict(self.current_solution, mv, require_feasibility=False, compute_cost=False)
-            if mv.helper['c1'] != mv.helper['c2']:
-                return mv
-
-def generate_random_lecture_slot(model):
-    l = random.randint(0, len(model.lectures) - 1)
-    r = random.randint(0, model.n_rooms - 1)
-    d = random.randint(0, model.n_days - 1)
-    s = random.randint(0, model.n_slots - 1)
-    return l, r, d, s
+    def set_rng(self, rng):
+        # Switch the move generation to another RandomStream, e.g. a spawned child
+        self.rng = rng
+        self.sampler.rng = rng
 
+    def generate_swap_move(self, solution=None):
+        # Effective move for solution (by default the current solution)
+        return self.sampler.sample(solution if solution is not None else self.current_solution)
@@ -0,0 +1,197 @@
+import os
+import random
+import time
+import numpy as np
+from multiprocessing import Pool
+from solution import Solution, SolutionPool
+from heuristic_solver_state import HeuristicSolverState
+from random_stream import RandomStream
+from growth_optimizer import growth_optimizer, initial_population
+
+# State of a worker process, set up once by _init_worker and reused by every
+# epoch that runs in that process
+_worker = {}
+
+def config_values(config):
+    """
+    Upper-case settings of a config object, as a plain (picklable) dict
+    """
+    return {name: getattr(config, name) for name in dir(config) if name.isupper()}
+
+def _init_worker(model, config, params):
+    config = type('Config', (object,), config)
+    popsize = config.POPULATION_SIZE
+    _worker['params'] = params
+    _worker['pool'] = SolutionPool(model, popsize)
+    _worker['state'] = HeuristicSolverState(model=model,
+                                            current_solution=Solution(model),
+                                            best_solution=Solution(model),
+                                            config=config)
+
+def _run_epoch(task):
+    """
+    Run one island for a number of evaluations.
+
+    Solutions travel between processes as the compact (3, L) arrays of
+    Solution.export_assignments(); the random states and the stagnation
+    counters of the island travel with them, so an epoch only depends on its
+    inputs (unless it is cut short by the deadline or by reaching the target
+    cost).
+    """
+    (population_assignments, stagnation, initial_assignments, rng_state, rng, best_cost, max_fes,
+     deadline, target_cost) = task
+    state = _worker['state']
+    pool = _worker['pool']
+    random.setstate(rng_state)
+    state.set_rng(rng)
+    # The state of the process is shared by all the islands scheduled on it:
+    # a cache left by another island would make the epoch depend on the
+    # scheduling
+    state.fitness_cache.clear()
+
+    state.current_solution.import_assignments(initial_assignments)
+    state.current_cost = state.current_solution.total_cost()
+    # Start from the global best, so the island only reports real improvements
+    state.best_cost = best_cost
+
+    if population_assignments is None:
+        population = initial_population(state, pool, state.config.POPULATION_SIZE)
+        fes = len(population)
+    else:
+        population = []
+        for assignments in population_assignments:
+            solution = pool.acquire()
+            solution.import_assignments(assignments)
+            population.append(solution)
+        fes = 0
+
+    # The island stops at the absolute deadline of the run, or as soon as it
+    # reaches the target cost, without waiting for the end of the epoch
+    def timeout():
+        return ((deadline is not None and time.time() > deadline) or
+                (target_cost is not None and state.best_cost <= target_cost))
+
+    if stagnation is None:
+        stagnation = [0] * len(population)
+    growth_optimizer(state, _worker['params'], timeout_callback=timeout, population=population,
+                     max_fes=max(0, max_fes - fes), stagnation=stagnation)
+
+    best_assignments = None
+    if state.best_cost < best_cost:
+        best_assignments = state.best_solution.export_assignments()
+
+    population_assignments = np.stack([solution.export_assignments() for solution in population])
+    fitness = [solution.total_cost() for solution in population]
+    for solution in population:
+        solution.release()
+
+    return (population_assignments, stagnation, fitness, state.best_cost, best_assignments,
+            random.getstate(), state.rng, max_fes)
+
+def migrate(populations, fitness, n_migrants, stagnation=None):
+    """
+    Ring migration: the best n_migrants individuals of each island replace the
+    worst individuals of the next island. The stagnation counters of the
+    replaced individuals, if given, restart from zero.
+    """
+    n_islands = len(populations)
+    emigrants = []
+    for i in range(n_islands):
+        best = sorted(range(len(fitness[i])), key=lambda k: fitness[i][k])[:n_migrants]
+        emigrants.append([(populations[i][k].copy(), fitness[i][k]) for k in best])
+
+    for i in range(n_islands):
+        target = (i + 1) % n_islands
+        worst = sorted(range(len(fitness[target])), key=lambda k: fitness[target][k], reverse=True)
+        for k, (assignments, cost) in zip(worst, emigrants[i]):
+            if cost < fitness[target][k]:
+                populations[target][k] = assignments
+                fitness[target][k] = cost
+                if stagnation is not None:
+                    stagnation[target][k] = 0
+
+def island_model(state, params, timeout_callback=None, verbose_callback=None, seed=None,
+                 deadline=None, target_cost=None):
+    """
+    Island model: NUM_SWARMS independent Growth Optimizer populations run in a
+    process pool, in epochs of MIGRATION_INTERVAL evaluations, exchanging their
+    elites between epochs.
+
+    Args:
+        state: Solver state containing the model and solutions
+        params: GrowthOptimizerParams instance
+        timeout_callback: Function to check if time limit has been reached
+        verbose_callback: Function to print progress updates
+        seed: Master seed (defaults to SEED)
+        deadline: Absolute time (time.time()) at which the islands stop,
+            within an epoch
+        target_cost: Cost at which the islands stop, within an epoch (e.g. a
+            lower bound)
+
+    timeout_callback is checked between epochs; the islands run in other
+    processes, so they stop mid-epoch through deadline and target_cost. Each
+    island has its own random streams spawned from the master seed, so a run
+    that ends on MAX_ITERATIONS is reproducible from the seed.
+    """
+    config = state.config
+    n_islands = config.NUM_SWARMS
+    max_fes = config.MAX_ITERATIONS
+    interval = config.MIGRATION_INTERVAL
+    n_migrants = config.MIGRANTS
+    if seed is None:
+        seed = config.SEED
+
+    # Independent random streams of each island: the random module state and
+    # the RandomStream of the move generation
+    rng_states = []
+    rngs = []
+    for child in np.random.SeedSequence(seed).spawn(n_islands):
+        python_seed, move_seed = child.spawn(2)
+        rng_states.append(random.Random(int(python_seed.generate_state(1)[0])).getstate())
+        rngs.append(RandomStream(move_seed))
+
+    initial_assignments = state.current_solution.export_assignments()
+    populations = [None] * n_islands
+    stagnation = [None] * n_islands
+    fitness = [None] * n_islands
+    fes = [0] * n_islands
+
+    n_processes = min(n_islands, os.cpu_count() or 1)
+    with Pool(n_processes, initializer=_init_worker,
+              initargs=(state.model, config_values(config), params)) as pool:
+        epoch = 0
+        while min(fes) < max_fes:
+            if timeout_callback and timeout_callback():
+                break
+
+            tasks = [(populations[i], stagnation[i], initial_assignments, rng_states[i], rngs[i], state.best_cost,
+                      min(interval, max_fes - fes[i]), deadline, target_cost)
+                     for i in range(n_islands)]
+            results = pool.map(_run_epoch, tasks)
+
+            for i, (population_assignments, island_stagnation, island_fitness, best_cost, best_assignments,
+                    rng_state, rng, island_fes) in enumerate(results):
+                populations[i] = population_assignments
+                stagnation[i] = island_stagnation
+                fitness[i] = island_fitness
+                rng_states[i] = rng_state
+                rngs[i] = rng
+                fes[i] += island_fes
+
+                # Shared global best
+                if best_assignments is not None and best_cost < state.best_cost:
+                    state.best_cost = best_cost
+                    state.best_solution.import_assignments(best_assignments)
+
+            if n_islands > 1 and n_migrants > 0:
+                migrate(populations, fitness, n_migrants, stagnation)
+
+            epoch += 1
+            if verbose_callback:
+                verbose_callback(epoch, 0, min(min(f) for f in fitness),
+                                 min(min(f) for f in fitness), state.best_cost, 0)
+
+    state.current_solution.copy_from(state.best_solution)
+    state.current_cost = state.best_cost
+
+    return state.best_cost
@@ -0,0 +1,68 @@
+import numpy as np
+from swap import SwapMove, swap_predict_batch, swap_extended
+from room_matching import reassign_rooms, all_periods
+
+class SwapNeighbourhood:
+    """
+    The full swap neighbourhood of a model: every (lecture, target cell) pair
+    whose target period is available to the course of the lecture, as flat
+    arrays ready for swap_predict_batch.
+    """
+    def __init__(self, model):
+        L, R, D, S = len(model.lectures), model.n_rooms, model.n_days, model.n_slots
+        l1, cell = np.meshgrid(np.arange(L), np.arange(R * D * S), indexing='ij')
+        l1, cell = l1.ravel(), cell.ravel()
+        r2, period = np.divmod(cell, D * S)
+        d2, s2 = np.divmod(period, S)
+        available = model.availability_cds[model.lecture_course[l1], d2, s2]
+
+        self.l1 = l1[available]
+        self.cell = cell[available]
+        self.r2 = r2[available]
+        self.d2 = d2[available]
+        self.s2 = s2[available]
+
+def steepest_descent(sol, neighbourhood, max_rounds, room_matching=False, timeout_callback=None):
+    """
+    Best-improvement local search. Each round evaluates the whole swap
+    neighbourhood of sol at once and applies the feasible move with the
+    largest cost decrease; the search stops at a local optimum, after
+    max_rounds rounds or when timeout_callback returns True.
+
+    Args:
+        sol: Solution to improve in place
+        neighbourhood: SwapNeighbourhood of the model of sol
+        max_rounds: Maximum number of rounds (neighbourhood scans) to run
+        room_matching: At a swap local optimum, re-assign the rooms of all
+            the periods optimally (reassign_rooms) and go on if it improved
+        timeout_callback: Function checked before every round
+
+    Returns:
+        (moves, rounds): number of moves (or room re-assignments) applied and
+        number of rounds run
+    """
+    n = neighbourhood
+    moves = 0
+    for rounds in range(max_rounds):
+        if timeout_callback and timeout_callback():
+            return moves, rounds
+
+        # Swapping two lectures is the same move from either side: keep the
+        # one from the lower lecture index, plus the moves to empty cells
+        l2 = sol.l_rds[n.cell]
+        candidates = np.flatnonzero((l2 < 0) | (l2 > n.l1))
+        l1, r2, d2, s2 = n.l1[candidates], n.r2[candidates], n.d2[candidates], n.s2[candidates]
+
+        result = swap_predict_batch(sol, l1, r2, d2, s2)
+        delta = np.where(result.feasible, result.cost, 0)
+        best = int(np.argmin(delta))
+        if delta[best] >= 0:
+            if room_matching and reassign_rooms(sol, all_periods(sol.model)) < 0:
+                moves += 1
+                continue
+            return moves, rounds + 1
+
+        mv = SwapMove(int(l1[best]), int(r2[best]), int(d2[best]), int(s2[best]))
+        swap_extended(sol, mv, strategy='if_feasible_and_better')
+        moves += 1
+    return moves, max_rounds
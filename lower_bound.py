@@ -0,0 +1,65 @@
+import numpy as np
+from solution import ROOM_CAPACITY_COST_FACTOR, MIN_WORKING_DAYS_COST_FACTOR, CURRICULUM_COMPACTNESS_COST_FACTOR
+
+# Lower bounds of the soft-cost components of any feasible solution of a
+# model. Each bound holds for its component alone, so their sum bounds the
+# total cost.
+
+def room_capacity_bound(model):
+    """
+    Every lecture takes one of the R * D * S room-slots. Relaxing all the
+    other constraints, pairing the lectures sorted by number of students
+    with the room-slots sorted by capacity minimizes the total excess (the
+    excess max(0, students - capacity) is a convex function of the
+    difference), so it is the unavoidable room capacity cost.
+    """
+    students = np.sort(model.course_n_students[model.lecture_course])[::-1]
+    capacities = np.sort(np.repeat(model.room_capacity, model.n_days * model.n_slots))[::-1]
+    # (With more lectures than room-slots there is no feasible solution)
+    n = min(len(students), len(capacities))
+    excess = np.maximum(0, students[:n] - capacities[:n])
+    return int(np.sum(excess)) * ROOM_CAPACITY_COST_FACTOR
+
+def min_working_days_bound(model):
+    """
+    A course works at most on as many days as it has lectures, and only on
+    the days with at least one period available to it.
+    """
+    available_days = np.count_nonzero(np.any(model.availability_cds, axis=2), axis=1)
+    n_lectures = np.array([len(lectures) for lectures in model.course_lectures])
+    max_days = np.minimum(n_lectures, available_days)
+    missing_days = np.maximum(0, model.course_min_working_days - max_days)
+    return int(np.sum(missing_days)) * MIN_WORKING_DAYS_COST_FACTOR
+
+def curriculum_compactness_bound(model):
+    """
+    A curriculum with a single lecture always has an isolated lecture, and
+    with a single slot per day every lecture is isolated.
+    """
+    n_lectures = model.curriculum_course @ np.array([len(lectures) for lectures in model.course_lectures])
+    if model.n_slots == 1:
+        isolated = int(np.sum(n_lectures))
+    else:
+        isolated = int(np.count_nonzero(n_lectures == 1))
+    return isolated * CURRICULUM_COMPACTNESS_COST_FACTOR
+
+def room_stability_bound(model):
+    # Any room can host any lecture (capacity is a soft constraint), so all
+    # the lectures of a course can always share one room
+    return 0
+
+def lower_bound(model):
+    """
+    Lower bounds of the cost components of the solutions of a model.
+
+    Returns:
+        Dictionary with the same keys as Solution.compute_cost_components()
+    """
+    bound = {
+        'room_capacity_cost': room_capacity_bound(model),
+        'min_working_days_cost': min_working_days_bound(model),
+        'curriculum_compactness_cost': curriculum_compactness_bound(model),
+        'room_stability_cost': room_stability_bound(model),
+    }
+    bound['cost'] = sum(bound.values())
+    return bound
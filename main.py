@@ -2,9 +2,15 @@
 from model_parser import TimetableModel
 from solution import *
 from feasible_solution_finder import FeasibleSolutionFinder, FeasibleSolutionFinderConfig
-from heuristic_solver_state import HeuristicSolverState
+from heuristic_solver_state import HeuristicSolverState, SolverStats
 from growth_optimizer import GrowthOptimizerParams, growth_optimizer
+from island_model import island_model
+from simulated_annealing import SimulatedAnnealingParams, simulated_annealing
+from tabu_search import TabuSearchParams, tabu_search
+from portfolio import PortfolioParams, default_methods, portfolio
+from lower_bound import lower_bound
 
+import random
 import time
 from config import *
 
@@ -18,6 +24,17 @@ CONFIG = type('Config', (object,), {
     'R_CLOUD': R_CLOUD,
     'TIME': TIME,
     'GD_ITER': GD_ITER,
+    'MIGRATION_INTERVAL': MIGRATION_INTERVAL,
+    'MIGRANTS': MIGRANTS,
+    'FINDER_PROCESSES': FINDER_PROCESSES,
+    'SAMPLER_BIAS': SAMPLER_BIAS,
+    'SEED': SEED,
+    'METHOD': METHOD,
+    'PORTFOLIO_SLICE': PORTFOLIO_SLICE,
+    'FITNESS_CACHE_SIZE': FITNESS_CACHE_SIZE,
+    'DIVERSITY_REPLACEMENT': DIVERSITY_REPLACEMENT,
+    'MIN_DIVERSITY': MIN_DIVERSITY,
+    'AUDIT_COST': AUDIT_COST,
     'INPUT': INPUT,
     'OUTPUT': OUTPUT
 })
@@ -30,10 +47,18 @@ def timeout_callback_factory(seconds):
 
 def verbose_callback(iteration, idle, current, local_best, global_best, temperature):
     print(f"Iter {iteration} | Idle {idle} | Curr {current} | Local Best {local_best} "
-          f"| Global Best {global_best}")
+          f"| Global Best {global_best} | Temp {temperature:.3f}")
+
+
+def diversity_callback(iteration, diversity):
+    if iteration % 10 == 0:
+        print(f"Iter {iteration} | Distance {diversity.distance:.3f} | Entropy {diversity.entropy:.3f} "
+              f"| Unique {diversity.unique}")
 
 
 def main():
+    random.seed(SEED)
+
     # === Load model ===
     model = TimetableModel()
     model.parse(INPUT)
@@ -45,11 +70,18 @@ def main():
     solution = Solution(model)
 
     print("Finding initial feasible solution...")
-    if not finder.find(config, solution):
+    population = None
+    if FINDER_PROCESSES > 1:
+        population = finder.find_parallel(config, solution, k=POPULATION_SIZE,
+                                          processes=FINDER_PROCESSES, seed=SEED)
+        if not population:
+            print("Failed to find an initial feasible solution.")
+            return
+    elif not finder.find(config, solution):
         print("Failed to find an initial feasible solution.")
         return
 
-    initial_cost = solution.compute_total_cost()
+    initial_cost = solution.total_cost()
     print("Initial feasible solution cost:", initial_cost)
 
     # === Prepare solver state ===
@@ -61,24 +93,67 @@ def main():
                                   best_solution=best_solution,
                                   current_cost=initial_cost,
                                   best_cost=initial_cost,
-                                  config=CONFIG)
+                                  config=CONFIG,
+                                  stats=SolverStats())
     
-    state.methods_name = ["Growth Optimizer"]
-    state.method = 0
+    # === Lower bound: the search stops as soon as the best solution reaches it ===
+    bound = lower_bound(model)
+    print("Lower bound:", bound['cost'], {name: value for name, value in bound.items() if name != 'cost'})
 
-    # === Configure Growth Optimizer ===
-    params = GrowthOptimizerParams(
-        p1=5,    # Number of top solutions to consider
-        p2=0.001, # Probability of accepting worse solutions
-        p3=0.3    # Probability of applying reflection
-    )
-
-    # === Run Growth Optimizer ===
-    print("Running Growth Optimizer...")
-    timeout = timeout_callback_factory(TIME)  # Use TIME from config.py
-    growth_optimizer(state, params, timeout_callback=timeout, verbose_callback=verbose_callback)
+    # === Run the search engine ===
+    state.method = 0
+    time_limit = timeout_callback_factory(TIME)  # Use TIME from config.py
+    deadline = time.time() + TIME
+    timeout = lambda: state.best_cost <= bound['cost'] or time_limit()
+    start = time.time()
+    if METHOD == 'simulated_annealing':
+        state.add_method("Simulated Annealing")
+        print("Running Simulated Annealing...")
+        simulated_annealing(state, SimulatedAnnealingParams(), timeout_callback=timeout,
+                            verbose_callback=verbose_callback)
+    elif METHOD == 'tabu_search':
+        state.add_method("Tabu Search")
+        print("Running Tabu Search...")
+        tabu_search(state, TabuSearchParams(), timeout_callback=timeout, verbose_callback=verbose_callback)
+    else:
+        # === Configure Growth Optimizer ===
+        params = GrowthOptimizerParams(
+            p1=5,    # Number of top solutions to consider
+            p2=0.001, # Probability of accepting worse solutions
+            p3=0.3    # Probability of applying reflection
+        )
+
+        if METHOD == 'portfolio':
+            print("Running the method portfolio...")
+            portfolio(state, default_methods(state, params, population=population),
+                      PortfolioParams(slice_seconds=PORTFOLIO_SLICE),
+                      timeout_callback=timeout, verbose_callback=verbose_callback)
+            for method in state.stats.methods:
+                print(f"  {method['name']}: {method['time']:.1f} s, "
+                      f"{method['improvement_count']} improving slices, delta {method['improvement_delta']}")
+        elif NUM_SWARMS > 1:
+            state.add_method("Growth Optimizer")
+            print(f"Running Growth Optimizer on {NUM_SWARMS} islands...")
+            island_model(state, params, timeout_callback=timeout, verbose_callback=verbose_callback,
+                         deadline=deadline, target_cost=bound['cost'])
+        else:
+            state.add_method("Growth Optimizer")
+            print("Running Growth Optimizer...")
+            growth_optimizer(state, params, timeout_callback=timeout, verbose_callback=verbose_callback,
+                             population=population, diversity_callback=diversity_callback)
+    elapsed = time.time() - start
+    if state.move_count:
+        print(f"Evaluated moves: {state.move_count} ({state.move_count / elapsed:.0f}/s)")
+    cache = state.fitness_cache
+    if cache.hits + cache.misses:
+        print(f"Fitness cache: {cache.hits} hits / {cache.hits + cache.misses} lookups "
+              f"({cache.hit_rate():.1%}), {len(cache)} entries")
 
     print("\nFinal best cost:", state.best_cost)
+    if state.best_cost <= bound['cost']:
+        print(f"Optimal: the lower bound was reached after {elapsed:.1f} s")
+    else:
+        print(f"Gap to the lower bound: {state.best_cost - bound['cost']}")
     print("Final best solution:")
     print(state.best_solution.to_string())
 
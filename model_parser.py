@@ -1,5 +1,6 @@
 from model import Course, Room, Curricula, UnavailabilityConstraint, Teacher, Lecture
 from collections import defaultdict
+import numpy as np
 
 class TimetableModel:
     def __init__(self):
@@ -26,7 +27,8 @@ class TimetableModel:
 
         self.course_belongs_to_curricula = {}
         self.course_taught_by_teacher = {}
-        self.course_availabilities = defaultdict(lambda: True)
+        # Only the unavailable periods are stored: missing keys are available
+        self.course_availabilities = {}
         self.curriculas_of_course = defaultdict(list)
         self.courses_of_teacher = defaultdict(list)
         self.courses_of_curricula = defaultdict(list)
@@ -128,5 +130,100 @@ class TimetableModel:
                 self.lectures.append(Lecture(l_index, course))
                 l_index += 1
 
+        self.compile()
+
+    def compile(self):
+        # Integer index tables used by the hot paths instead of the
+        # string-keyed dictionaries
+        C, Q = len(self.courses), len(self.curriculas)
+
+        # Curricula of each course in CSR form: the curricula of course c are
+        # course_curricula_indices[course_curricula_offsets[c]:course_curricula_offsets[c + 1]]
+        curricula = [
+            [self.curricula_by_id[q_id].index for q_id in self.curriculas_of_course[course.id]]
+            for course in self.courses
+        ]
+        self.course_curricula_offsets = np.zeros(C + 1, dtype=int)
+        self.course_curricula_offsets[1:] = np.cumsum([len(qs) for qs in curricula])
+        self.course_curricula_indices = np.array([q for qs in curricula for q in qs], dtype=int)
+
+        # The same rows as Python lists, cheaper to iterate in scalar code
+        offsets = self.course_curricula_offsets.tolist()
+        indices = self.course_curricula_indices.tolist()
+        self.course_curricula = [indices[offsets[c]:offsets[c + 1]] for c in range(C)]
+
+        # Curriculum indices of each course padded with -1, for batched
+        # evaluation (no columns at all in a model without curricula)
+        max_curricula = max([len(qs) for qs in self.course_curricula] + [0])
+        self.course_curricula_table = np.full((C, max_curricula), -1, dtype=int)
+        for c, qs in enumerate(self.course_curricula):
+            self.course_curricula_table[c, :len(qs)] = qs
+
+        # Curriculum/course incidence matrix, shape (Q, C)
+        self.curriculum_course = np.zeros((Q, C), dtype=int)
+        self.curriculum_course[self.course_curricula_indices,
+                               np.repeat(np.arange(C), np.diff(self.course_curricula_offsets))] = 1
+
+        self.lecture_course = np.array([lecture.course.index for lecture in self.lectures], dtype=int)
+        # Lectures of each course and courses of each curriculum, as list rows
+        self.course_lectures = [[] for _ in range(C)]
+        for lecture in self.lectures:
+            self.course_lectures[lecture.course.index].append(lecture.index)
+        self.curriculum_courses = [np.flatnonzero(row).tolist() for row in self.curriculum_course]
+        self.course_teacher = np.array([course.teacher.index for course in self.courses], dtype=int)
+
+        # Course/room arrays used by the vectorized cost evaluation
+        self.course_n_students = np.array([c.n_students for c in self.courses], dtype=int)
+        self.course_min_working_days = np.array([c.min_working_days for c in self.courses], dtype=int)
+        self.room_capacity = np.array([r.capacity for r in self.rooms], dtype=int)
+        self.capacity_excess_cr = np.maximum(0, self.course_n_students[:, None] - self.room_capacity[None, :])
+
+        # Two courses conflict (their lectures cannot share a period) if they
+        # are the same course, have the same teacher or share a curriculum
+        self.course_conflicts = (
+            (self.course_teacher[:, None] == self.course_teacher[None, :]) |
+            (self.curriculum_course.T @ self.curriculum_course > 0)
+        )
+
+        # Number of isolated slots for every bitmask of occupied slots of a day
+        self.isolated_by_mask = [
+            bin(mask & ~(mask << 1) & ~(mask >> 1)).count("1")
+            for mask in range(1 << self.n_slots)
+        ]
+
+        # Zobrist keys of each (course, cell): the hash of a solution is the XOR
+        # of the keys of its assigned lectures. Lectures of the same course
+        # are interchangeable, so they share their keys
+        rng = np.random.default_rng(0)
+        self.zobrist_keys = rng.integers(0, 2**64, size=(C, self.n_rooms * self.n_days * self.n_slots),
+                                         dtype=np.uint64)
+
+        # Availability mask of each (course, day, slot)
+        self.availability_cds = np.ones((C, self.n_days, self.n_slots), dtype=bool)
+        for uc in self.unavailability_constraints:
+            if uc.course is not None:
+                self.availability_cds[uc.course.index, uc.day, uc.period] = False
+        self._make_views()
+
+    def _make_views(self):
+        # Scalar reads through memoryviews return plain ints and are much
+        # cheaper than NumPy scalar indexing in the hot paths
+        self.lecture_course_view = memoryview(self.lecture_course)
+        self.course_teacher_view = memoryview(self.course_teacher)
+        self.course_min_working_days_view = memoryview(self.course_min_working_days)
+        self.capacity_excess_view = memoryview(self.capacity_excess_cr)
+        self.availability_view = memoryview(self.availability_cds)
+        self.course_conflicts_view = memoryview(self.course_conflicts)
+        self.zobrist_view = memoryview(self.zobrist_keys)
+
+    def __getstate__(self):
+        # Memoryviews cannot be pickled: they are rebuilt on unpickling, so the
+        # model can be shipped to worker processes
+        return {name: value for name, value in self.__dict__.items() if not name.endswith('_view')}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._make_views()
+
     def is_available(self, course_id, day, period):
         return self.course_availabilities.get((course_id, day, period), True)
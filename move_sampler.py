@@ -0,0 +1,112 @@
+import numpy as np
+from random_stream import RandomStream
+from swap import SwapMove, swap_move_compute_helper
+from solution import ROOM_CAPACITY_COST_FACTOR, MIN_WORKING_DAYS_COST_FACTOR, CURRICULUM_COMPACTNESS_COST_FACTOR, ROOM_STABILITY_COST_FACTOR
+
+def lecture_cost(sol, l):
+    """
+    Soft cost the lecture takes part in: the capacity excess of its room, the
+    missing working days and room instability of its course, and its
+    isolation in each of its curricula. 0 for an unassigned lecture.
+    """
+    r = sol.lecture_r_view[l]
+    if r < 0:
+        return 0
+    d = sol.lecture_d_view[l]
+    s = sol.lecture_s_view[l]
+    model = sol.model
+    c = model.lecture_course_view[l]
+
+    cost = model.capacity_excess_view[c, r] * ROOM_CAPACITY_COST_FACTOR
+    if sol.working_days_c_view[c] < model.course_min_working_days_view[c]:
+        cost += MIN_WORKING_DAYS_COST_FACTOR
+    if sol.used_rooms_c_view[c] > 1:
+        cost += ROOM_STABILITY_COST_FACTOR
+
+    # Occupied neighbour slots of s in a day bitmask
+    neighbours = (1 << (s + 1)) | ((1 << s) >> 1)
+    slots_qd = sol.slots_qd_view
+    for q in model.course_curricula[c]:
+        if not slots_qd[q, d] & neighbours:
+            cost += CURRICULUM_COMPACTNESS_COST_FACTOR
+    return cost
+
+
+class MoveSampler:
+    """
+    Draws effective swap moves (c1 != c2) in expected O(1), replacing the
+    rejection loop on swap_predict.
+
+    The target cell is either one of the empty cells of the solution (drawn
+    from Solution.empty_cells, with the same probability as a uniform draw
+    over all cells) or a cell in one of the periods the course of the lecture
+    may use. Moves that would put a lecture in an unavailable period are
+    never drawn. With probability bias, the lecture is drawn among the
+    lectures that contribute to the soft cost (up to bias_tries draws).
+
+    All the draws of a move come from one row of the RandomStream rng.
+    """
+    def __init__(self, model, rng=None, bias=0.0, bias_tries=8):
+        self.model = model
+        self.rng = rng if rng is not None else RandomStream()
+        self.bias = bias
+        self.bias_tries = bias_tries
+        self.L = len(model.lectures)
+        self.R = model.n_rooms
+        self.D = model.n_days
+        self.S = model.n_slots
+
+        # Periods (d * S + s) each course may use
+        availability = model.availability_cds.reshape(len(model.courses), -1)
+        self.course_periods = [np.flatnonzero(periods).tolist() for periods in availability]
+
+    def sample_lecture(self, sol, u):
+        l = int(u * self.L)
+        if self.bias and self.rng.random() < self.bias:
+            for _ in range(self.bias_tries):
+                if lecture_cost(sol, l) > 0:
+                    break
+                l = self.rng.randrange(self.L)
+        return l
+
+    def sample(self, sol):
+        model = self.model
+        rng = self.rng
+        lecture_course = model.lecture_course_view
+        available = model.availability_view
+        L, R, D, S = self.L, self.R, self.D, self.S
+        n_cells = R * D * S
+
+        while True:
+            u_lecture, u_target, u_cell, u_room = rng.row()
+            l1 = self.sample_lecture(sol, u_lecture) if self.bias else int(u_lecture * L)
+            c1 = lecture_course[l1]
+
+            n_empty = sol.n_empty
+            if u_target * n_cells < n_empty:
+                # Move to an empty cell
+                r2, period = divmod(sol.empty_cells_view[int(u_cell * n_empty)], D * S)
+                d2, s2 = divmod(period, S)
+                if not available[c1, d2, s2]:
+                    continue
+            else:
+                periods = self.course_periods[c1]
+                if not periods:
+                    continue
+                d2, s2 = divmod(periods[int(u_cell * len(periods))], S)
+                r2 = int(u_room * R)
+                l2 = sol.lecture_at(r2, d2, s2)
+                if l2 >= 0:
+                    # Swap with a lecture of another course, which must be
+                    # allowed in the period of l1
+                    c2 = lecture_course[l2]
+                    if c2 == c1:
+                        continue
+                    d1 = sol.lecture_d_view[l1]
+                    if d1 >= 0 and not available[c2, d1, sol.lecture_s_view[l1]]:
+                        continue
+
+            mv = SwapMove(l1, r2, d2, s2)
+            swap_move_compute_helper(sol, mv)
+            if mv.c1 != mv.c2:
+                return mv
@@ -0,0 +1,164 @@
+import math
+import time
+from swap import swap_extended
+from solution import SolutionPool
+from growth_optimizer import growth_optimizer, initial_population
+from simulated_annealing import SimulatedAnnealingParams, simulated_annealing
+from tabu_search import TabuSearchParams, tabu_search
+from local_search import SwapNeighbourhood, steepest_descent
+
+class PortfolioParams:
+    def __init__(self,
+                 slice_seconds=2.0,
+                 exploration=0.3,
+                 discount=0.8):
+        """
+        Parameters for the portfolio scheduler
+
+        Args:
+            slice_seconds: Length of the time slice given to a method
+            exploration: Weight of the exploration term of the UCB score
+            discount: Factor applied to the past rewards of every method after
+                each slice, so that recent slices weigh the most
+        """
+        self.slice_seconds = slice_seconds
+        self.exploration = exploration
+        self.discount = discount
+
+def local_search(state, timeout_callback, max_rounds, neighbourhood):
+    """
+    Iterated steepest descent on the current solution: descend to a local
+    optimum (with room matching), then kick it with random feasible swaps.
+    """
+    sol = state.current_solution
+    while not timeout_callback():
+        n_moves, n_rounds = steepest_descent(sol, neighbourhood, max_rounds, room_matching=True,
+                                             timeout_callback=timeout_callback)
+        state.move_count += n_moves
+        state.current_cost = sol.total_cost()
+        if state.current_cost < state.best_cost:
+            state.best_cost = state.current_cost
+            state.best_solution.copy_from(sol)
+
+        if n_rounds < max_rounds and not timeout_callback():
+            # Local optimum: kick from the best solution
+            sol.copy_from(state.best_solution)
+            for _ in range(max(1, state.L // 20)):
+                swap_extended(sol, state.generate_swap_move(sol), strategy='if_feasible')
+    state.current_cost = sol.total_cost()
+
+def default_methods(state, go_params, population=None):
+    """
+    Methods of the portfolio: the growth optimizer, simulated annealing, tabu
+    search and iterated local search, as (name, run) pairs where
+    run(state, timeout_callback) works on the state for one time slice.
+
+    The growth optimizer keeps its population from one slice to the next; the
+    best solution found by the other methods replaces its worst individual.
+    """
+    if population is None:
+        pool = SolutionPool(state.model, state.config.POPULATION_SIZE)
+        population = initial_population(state, pool, state.config.POPULATION_SIZE)
+    # Stagnation counters of the population, carried over from slice to slice
+    stagnation = [0] * len(population)
+    neighbourhood = SwapNeighbourhood(state.model)
+    sa_params = SimulatedAnnealingParams()
+    tabu_params = TabuSearchParams()
+
+    def run_growth_optimizer(state, timeout_callback):
+        worst = max(range(len(population)), key=lambda i: population[i].total_cost())
+        if state.best_cost < population[worst].total_cost():
+            population[worst].copy_from(state.best_solution)
+            stagnation[worst] = 0
+        growth_optimizer(state, go_params, timeout_callback=timeout_callback, population=population,
+                         stagnation=stagnation)
+
+    def run_simulated_annealing(state, timeout_callback):
+        # The cooling schedule goes on across slices
+        simulated_annealing(state, sa_params, timeout_callback=timeout_callback,
+                            temperature=state.temperature)
+
+    def run_tabu_search(state, timeout_callback):
+        tabu_search(state, tabu_params, timeout_callback=timeout_callback)
+
+    def run_local_search(state, timeout_callback):
+        local_search(state, timeout_callback, max(1, state.config.GD_ITER), neighbourhood)
+
+    return [("Growth Optimizer", run_growth_optimizer),
+            ("Simulated Annealing", run_simulated_annealing),
+            ("Tabu Search", run_tabu_search),
+            ("Local Search", run_local_search)]
+
+def portfolio(state, methods, params, timeout_callback=None, verbose_callback=None):
+    """
+    Run several methods in time slices and give the CPU time to the most
+    productive one. Each slice starts from the best solution; its reward is
+    the decrease of the best cost per second. The next method is chosen by a
+    discounted UCB bandit over these rewards, normalized by the best mean
+    reward, after every method has had one slice. The per-method figures are
+    accumulated in state.stats.methods.
+
+    Args:
+        state: Solver state containing the model and solutions, with stats
+        methods: List of (name, run) pairs, as returned by default_methods
+        params: PortfolioParams instance
+        timeout_callback: Function to check if time limit has been reached
+        verbose_callback: Function to print progress updates
+    """
+    stats = state.stats
+    indices = [state.add_method(name) for name, _ in methods]
+    n = len(methods)
+    # Discounted reward sums and slice counts
+    rewards = [0.0] * n
+    plays = [0.0] * n
+
+    n_slices = 0
+    idle = 0
+    while not (timeout_callback and timeout_callback()):
+        if n_slices < n:
+            k = n_slices
+        else:
+            means = [rewards[j] / plays[j] for j in range(n)]
+            scale = max(means) or 1
+            log_total = math.log(sum(plays))
+            k = max(range(n), key=lambda j: means[j] / scale +
+                    params.exploration * math.sqrt(2 * max(log_total, 0) / plays[j]))
+
+        state.method = indices[k]
+        state.current_solution.copy_from(state.best_solution)
+        state.current_cost = state.best_cost
+        best_cost_before = state.best_cost
+        moves_before = state.move_count
+
+        start = time.time()
+        slice_timeout = lambda: (time.time() - start > params.slice_seconds or
+                                 bool(timeout_callback and timeout_callback()))
+        methods[k][1](state, slice_timeout)
+        elapsed = max(time.time() - start, 1e-9)
+
+        reward = (best_cost_before - state.best_cost) / elapsed
+        for j in range(n):
+            rewards[j] *= params.discount
+            plays[j] *= params.discount
+        rewards[k] += reward
+        plays[k] += 1
+
+        entry = stats.methods[state.method]
+        entry['move_count'] += state.move_count - moves_before
+        entry['time'] += elapsed
+        if state.best_cost < best_cost_before:
+            entry['improvement_count'] += 1
+            entry['improvement_delta'] += state.best_cost - best_cost_before
+            idle = 0
+        else:
+            idle += 1
+        stats.cycle_count += 1
+
+        n_slices += 1
+        if verbose_callback:
+            verbose_callback(n_slices, idle, state.current_cost,
+                             state.current_cost, state.best_cost, 0)
+
+    state.current_solution.copy_from(state.best_solution)
+    state.current_cost = state.best_cost
+    return state.best_cost
@@ -0,0 +1,42 @@
+import numpy as np
+
+class RandomStream:
+    """
+    Uniform random numbers drawn from a numpy.random.Generator in blocks of
+    block_size rows of width floats, handed out one row at a time. One row
+    covers all the draws of a move, so the per-move cost is a list lookup
+    instead of several calls to the random module.
+
+    A stream is reproducible from its seed, and spawn() derives independent
+    child streams (e.g. one per worker process) through numpy's SeedSequence.
+    """
+    def __init__(self, seed=None, block_size=4096, width=4):
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence = seed
+        self.generator = np.random.default_rng(seed)
+        self.block_size = block_size
+        self.width = width
+        self._rows = []
+        self._pos = 0
+
+    def _refill(self):
+        self._rows = self.generator.random((self.block_size, self.width)).tolist()
+        self._pos = 0
+
+    def row(self):
+        # Next row of width uniform floats in [0, 1)
+        if self._pos == len(self._rows):
+            self._refill()
+        row = self._rows[self._pos]
+        self._pos += 1
+        return row
+
+    def random(self):
+        return self.row()[0]
+
+    def randrange(self, n):
+        return int(self.row()[0] * n)
+
+    def spawn(self, n):
+        return [RandomStream(child, self.block_size, self.width) for child in self.seed_sequence.spawn(n)]
@@ -0,0 +1,126 @@
+import numpy as np
+from solution import ROOM_CAPACITY_COST_FACTOR, ROOM_STABILITY_COST_FACTOR
+
+def min_cost_assignment(cost):
+    """
+    Minimum-cost assignment of every row to a distinct column (Hungarian
+    algorithm with potentials, O(n^2 m)).
+
+    Args:
+        cost: n x m matrix (list of lists of ints), with n <= m
+
+    Returns:
+        List with the column assigned to each row
+    """
+    n, m = len(cost), len(cost[0])
+    INF = float('inf')
+    # 1-based potentials of rows (u) and columns (v); p[j] is the row matched
+    # to column j, and column 0 is the virtual start of the augmenting paths
+    u = [0] * (n + 1)
+    v = [0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        min_v = [INF] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row = cost[i0 - 1]
+            delta = INF
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    reduced = row[j - 1] - u[i0] - v[j]
+                    if reduced < min_v[j]:
+                        min_v[j] = reduced
+                        way[j] = j0
+                    if min_v[j] < delta:
+                        delta = min_v[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_v[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        # Augment along the alternating path
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    assignment = [-1] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            assignment[p[j] - 1] = j - 1
+    return assignment
+
+def room_assignment_costs(sol, lectures):
+    """
+    Cost of giving each room to each of the lectures of one period: the
+    capacity excess plus the room stability penalty of opening a new room
+    for the course. This is exact when every lecture of the period belongs
+    to a different course, which holds in any feasible solution.
+
+    Ties are broken towards the rooms the course uses most in the other
+    periods, then towards the current room: the exact cost is scaled so that
+    the tie-breaking term never outweighs it.
+    """
+    model = sol.model
+    R, L = sol.R, sol.L
+    excess = model.capacity_excess_view
+    sum_cr = sol.sum_cr_view
+    scale = (L + 2) * len(lectures) + 1
+
+    costs = []
+    for l in lectures:
+        c = model.lecture_course_view[l]
+        current = sol.lecture_r_view[l]
+        row = []
+        for r in range(R):
+            # Lectures of the course in room r, not counting l
+            others = sum_cr[c, r] - (r == current)
+            cost = (excess[c, r] * ROOM_CAPACITY_COST_FACTOR +
+                    (others == 0) * ROOM_STABILITY_COST_FACTOR)
+            row.append(cost * scale + (L - others) + (r != current))
+        costs.append(row)
+    return costs
+
+def reassign_rooms(sol, periods):
+    """
+    Large neighbourhood move: optimally re-assign the rooms of the lectures
+    of each period with a min-cost bipartite matching between the lectures
+    and all the rooms (empty rooms included). Periods are processed one after
+    the other, each exact given the others. The days and slots of the
+    lectures do not change, so the move keeps the solution feasible.
+
+    Args:
+        sol: Solution to modify in place
+        periods: Iterable of (day, slot) pairs
+
+    Returns:
+        Change of the total cost (<= 0)
+    """
+    cost_before = sol.total_cost()
+    for d, s in periods:
+        lectures = np.flatnonzero((sol.lecture_d == d) & (sol.lecture_s == s)).tolist()
+        if not lectures or len(lectures) > sol.R:
+            continue
+
+        rooms = min_cost_assignment(room_assignment_costs(sol, lectures))
+        moved = [(l, r) for l, r in zip(lectures, rooms) if r != sol.lecture_r_view[l]]
+        # Free all the old cells first, so that no move lands on an occupied one
+        for l, r in moved:
+            sol.unassign_lecture(l)
+        for l, r in moved:
+            sol.assign_lecture(l, r, d, s)
+    return sol.total_cost() - cost_before
+
+def all_periods(model):
+    return [(d, s) for d in range(model.n_days) for s in range(model.n_slots)]
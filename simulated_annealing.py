@@ -0,0 +1,106 @@
+import math
+
+class SimulatedAnnealingParams:
+    def __init__(self,
+                 initial_temperature=1.5,
+                 cooling_rate=0.97,
+                 moves_per_temperature=2000,
+                 min_temperature=0.05):
+        """
+        Parameters for simulated annealing
+
+        Args:
+            initial_temperature: Temperature at the start and after each reheat
+            cooling_rate: Factor applied to the temperature after each step
+            moves_per_temperature: Moves evaluated at each temperature step
+            min_temperature: Temperature below which the search restarts from
+                the best solution at initial_temperature
+        """
+        self.initial_temperature = initial_temperature
+        self.cooling_rate = cooling_rate
+        self.moves_per_temperature = moves_per_temperature
+        self.min_temperature = min_temperature
+
+def simulated_annealing(state, params, timeout_callback=None, verbose_callback=None, max_moves=None,
+                        temperature=None):
+    """
+    Simulated annealing on the current solution of the state. Each move is
+    drawn by state.generate_swap_move, evaluated in O(1) with
+    state.predict_swap_cost and accepted if feasible and either improving or
+    with probability exp(-delta / temperature).
+
+    Args:
+        state: Solver state containing the model and solutions
+        params: SimulatedAnnealingParams instance
+        timeout_callback: Function to check if time limit has been reached
+        verbose_callback: Function to print progress updates
+        max_moves: Number of moves to evaluate (defaults to no limit, in which
+            case timeout_callback ends the search)
+        temperature: Starting temperature, to resume a previous run (defaults
+            to params.initial_temperature); the final one is left in
+            state.temperature
+    """
+    rng = state.rng
+    audit_cost = state.config.AUDIT_COST
+    if temperature is None:
+        temperature = params.initial_temperature
+    state.current_cost = state.current_solution.total_cost()
+    if state.current_cost < state.best_cost:
+        state.best_cost = state.current_cost
+        state.best_solution.copy_from(state.current_solution)
+
+    moves = 0
+    step = 0
+    while max_moves is None or moves < max_moves:
+        if timeout_callback and timeout_callback():
+            break
+
+        best_cost_before = state.best_cost
+        for _ in range(params.moves_per_temperature):
+            mv = state.generate_swap_move()
+            result = state.predict_swap_cost(mv, require_feasibility=True)
+            moves += 1
+            if not result.feasible:
+                continue
+
+            delta = result.cost
+            if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                state.apply_swap(mv, result)
+
+                # Update global best
+                if state.current_cost < state.best_cost:
+                    state.best_cost = state.current_cost
+                    state.best_solution.copy_from(state.current_solution)
+
+                    if verbose_callback:
+                        verbose_callback(state.move_count + moves, 0, state.current_cost, state.current_cost,
+                                         state.best_cost, temperature)
+
+            if max_moves is not None and moves >= max_moves:
+                break
+
+        if audit_cost:
+            state.current_solution.audit_cost()
+
+        if state.best_cost < best_cost_before:
+            state.non_improving_best_cycles = 0
+        else:
+            state.non_improving_best_cycles += 1
+
+        # Cool down, or reheat from the best solution once frozen
+        temperature *= params.cooling_rate
+        if temperature < params.min_temperature:
+            temperature = params.initial_temperature
+            state.current_solution.copy_from(state.best_solution)
+            state.current_cost = state.best_cost
+
+        step += 1
+
+        # Periodic reporting
+        if verbose_callback and step % 10 == 0:
+            verbose_callback(state.move_count + moves, state.non_improving_best_cycles, state.current_cost,
+                             state.current_cost, state.best_cost, temperature)
+
+    state.move_count += moves
+    state.temperature = temperature
+    return state.best_cost
@@ -8,8 +8,70 @@ MIN_WORKING_DAYS_COST_FACTOR = 5
 CURRICULUM_COMPACTNESS_COST_FACTOR = 2
 ROOM_STABILITY_COST_FACTOR = 1
 
+def solution_layout(model):
+    """
+    Layout of the state arrays of a Solution inside its byte buffer, as a list
+    of (name, dtype, shape, fill value, byte offset), plus the buffer size.
+    A fill value of None fills the array with 0, 1, 2, ...
+    int32 arrays come first so that every array is naturally aligned.
+    """
+    C, R, D, S = len(model.courses), len(model.rooms), model.n_days, model.n_slots
+    T, Q, L = len(model.teachers), len(model.curriculas), len(model.lectures)
+    arrays = [
+        ('l_rds', np.int32, (R * D * S,), -1),
+        ('empty_cells', np.int32, (R * D * S,), None),
+        ('empty_pos', np.int32, (R * D * S,), None),
+        ('slots_qd', np.int32, (Q, D), 0),
+        ('lecture_r', np.int16, (L,), -1),
+        ('lecture_d', np.int16, (L,), -1),
+        ('lecture_s', np.int16, (L,), -1),
+        ('sum_cd', np.int16, (C, D), 0),
+        ('sum_cr', np.int16, (C, R), 0),
+        ('sum_qds', np.int16, (Q, D, S), 0),
+        ('sum_tds', np.int16, (T, D, S), 0),
+        ('sum_rds', np.int16, (R, D, S), 0),
+        ('working_days_c', np.int16, (C,), 0),
+        ('used_rooms_c', np.int16, (C,), 0),
+    ]
+    layout = []
+    offset = 0
+    for name, dtype, shape, fill in arrays:
+        layout.append((name, dtype, shape, fill, offset))
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    # Round the size up to a multiple of 8, so that the rows of a
+    # SolutionPool stay aligned as well
+    return layout, -(-offset // 8) * 8
+
+
+class Assignments:
+    # Read-only sequence view of the per-lecture room/day/slot arrays
+    def __init__(self, solution):
+        self.solution = solution
+
+    def __len__(self):
+        return self.solution.L
+
+    def __getitem__(self, l):
+        sol = self.solution
+        r = sol.lecture_r_view[l]
+        if r < 0:
+            return None
+        return Assignment(r, sol.lecture_d_view[l], sol.lecture_s_view[l])
+
+    def __iter__(self):
+        for l in range(self.solution.L):
+            yield self[l]
+
+
+# Scalar state copied along with the buffer
+SOLUTION_SCALARS = (
+    'n_assigned', 'n_conflicts', 'n_unavailable', 'n_empty', 'zobrist',
+    'room_capacity_cost', 'min_working_days_cost',
+    'curriculum_compactness_cost', 'room_stability_cost'
+)
+
 class Solution:
-    def __init__(self, model):
+    def __init__(self, model, buffer=None, pool=None):
         self.model = model
         self.C = len(model.courses)
         self.R = len(model.rooms)
@@ -19,64 +81,296 @@ class Solution:
         self.Q = len(model.curriculas)
         self.L = len(model.lectures)
 
-        self.assignments = [None] * self.L
-        self.timetable_crds = np.zeros((self.C, self.R, self.D, self.S), dtype=int)
-        self.sum_cd = np.zeros((self.C, self.D), dtype=int)
-        self.sum_cr = np.zeros((self.C, self.R), dtype=int)
-        self.sum_qds = np.zeros((self.Q, self.D, self.S), dtype=int)
-        self.l_rds = [[[-1 for _ in range(self.S)] for _ in range(self.D)] for _ in range(self.R)]
+        # All the state arrays live in one contiguous buffer (optionally a row
+        # of a SolutionPool):
+        #   lecture_r/d/s   room, day and slot of each lecture (-1 if unassigned)
+        #   l_rds           lecture in each (room, day, slot) cell, flattened (-1 if empty)
+        #   empty_cells     the n_empty empty cells first, in any order
+        #   empty_pos       position of each cell in empty_cells
+        #   sum_cd, sum_cr, sum_qds        lectures per (course, day), (course, room), (curriculum, day, slot)
+        #   sum_tds, sum_rds               occupancy counters for the incremental hard-constraint checks
+        #   slots_qd                       bitmask of occupied slots per (curriculum, day)
+        #   working_days_c, used_rooms_c   working days and used rooms per course
+        self.layout, size = solution_layout(model)
+        self.buffer = np.zeros(size, dtype=np.uint8) if buffer is None else buffer
+        self.pool = pool
+        self.pool_index = None
+        for name, dtype, shape, fill, offset in self.layout:
+            nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            array = self.buffer[offset:offset + nbytes].view(dtype).reshape(shape)
+            setattr(self, name, array)
+            # Scalar reads through memoryviews return plain ints and are much
+            # cheaper than NumPy scalar indexing in the hot paths
+            setattr(self, name + '_view', memoryview(array))
+        self.assignments = Assignments(self)
+        self.clear()
+
+    def clear(self):
+        # Undo log of the open transaction, None outside of begin()/commit()
+        self.undo_log = None
+
+        for name, dtype, shape, fill, offset in self.layout:
+            array = getattr(self, name)
+            if fill is None:
+                array[:] = np.arange(array.size)
+            else:
+                array.fill(fill)
+        self.n_empty = self.R * self.D * self.S
+        # Zobrist hash of the assignments, kept up to date by assign/unassign
+        self.zobrist = 0
+
+        self.n_assigned = 0
+        self.n_conflicts = 0
+        self.n_unavailable = 0
+
+        # Running soft-cost components, kept up to date by assign/unassign
+        self.room_capacity_cost = 0
+        # With no lecture assigned every course misses all of its working days
+        self.min_working_days_cost = int(np.sum(self.model.course_min_working_days)) * MIN_WORKING_DAYS_COST_FACTOR
+        self.curriculum_compactness_cost = 0
+        self.room_stability_cost = 0
+
+    def begin(self):
+        """
+        Start a transaction: every following assign/unassign is recorded so that
+        rollback() can restore the current state in O(number of changes).
+        """
+        assert self.undo_log is None, "Transaction already in progress"
+        self.undo_log = []
+
+    def commit(self):
+        self.undo_log = None
+
+    def savepoint(self):
+        # Position in the undo log of the open transaction, for rollback(savepoint)
+        return len(self.undo_log)
+
+    def rollback(self, savepoint=None):
+        # Restores the state exactly, except for the order of empty_cells. With
+        # a savepoint, only the changes made after it are undone and the
+        # transaction stays open
+        undo_log = self.undo_log
+        start = 0 if savepoint is None else savepoint
+        self.undo_log = None
+        for l, r, d, s in reversed(undo_log[start:]):
+            if r < 0:
+                self.unassign_lecture(l)
+            else:
+                self.assign_lecture(l, r, d, s)
+        if savepoint is not None:
+            del undo_log[start:]
+            self.undo_log = undo_log
 
     def assign_lecture(self, l, r, d, s):
-        lecture = self.model.lectures[l]
-        c = lecture.course.index
-        self.assignments[l] = Assignment(r, d, s)
-        self.timetable_crds[c, r, d, s] = 1
-        self.sum_cd[c][d] += 1
-        self.sum_cr[c][r] += 1
-        for q_id in self.model.curriculas_of_course[lecture.course.id]:
-            q = self.model.curricula_by_id[q_id].index
-            self.sum_qds[q][d][s] += 1
-        self.l_rds[r][d][s] = l
+        model = self.model
+        if self.undo_log is not None:
+            self.undo_log.append((l, -1, -1, -1))
+        c = model.lecture_course_view[l]
+        t = model.course_teacher_view[c]
+        self.lecture_r_view[l] = r
+        self.lecture_d_view[l] = d
+        self.lecture_s_view[l] = s
+        cell = (r * self.D + d) * self.S + s
+        self.l_rds_view[cell] = l
+        self._fill_cell(cell)
+        self.zobrist ^= model.zobrist_view[c, cell]
+
+        self.room_capacity_cost += model.capacity_excess_view[c, r] * ROOM_CAPACITY_COST_FACTOR
+        sum_cd = self.sum_cd_view
+        if sum_cd[c, d] == 0:
+            self._update_working_days(c, +1)
+        sum_cd[c, d] += 1
+        sum_cr = self.sum_cr_view
+        if sum_cr[c, r] == 0:
+            self._update_used_rooms(c, +1)
+        sum_cr[c, r] += 1
+
+        sum_qds = self.sum_qds_view
+        for q in model.course_curricula[c]:
+            if sum_qds[q, d, s] > 0:
+                self.n_conflicts += 1
+            else:
+                self._update_slots(q, d, self.slots_qd_view[q, d] | (1 << s))
+            sum_qds[q, d, s] += 1
+
+        sum_tds = self.sum_tds_view
+        if sum_tds[t, d, s] > 0:
+            self.n_conflicts += 1
+        sum_tds[t, d, s] += 1
+        sum_rds = self.sum_rds_view
+        if sum_rds[r, d, s] > 0:
+            self.n_conflicts += 1
+        sum_rds[r, d, s] += 1
+        if not model.availability_view[c, d, s]:
+            self.n_unavailable += 1
+        self.n_assigned += 1
 
     def unassign_lecture(self, l):
-        if self.assignments[l] is None:
+        r = self.lecture_r_view[l]
+        if r < 0:
+            return
+        d = self.lecture_d_view[l]
+        s = self.lecture_s_view[l]
+        model = self.model
+        if self.undo_log is not None:
+            self.undo_log.append((l, r, d, s))
+        c = model.lecture_course_view[l]
+        t = model.course_teacher_view[c]
+        self.lecture_r_view[l] = -1
+        self.lecture_d_view[l] = -1
+        self.lecture_s_view[l] = -1
+        cell = (r * self.D + d) * self.S + s
+        self.l_rds_view[cell] = -1
+        self._empty_cell(cell)
+        self.zobrist ^= model.zobrist_view[c, cell]
+
+        self.room_capacity_cost -= model.capacity_excess_view[c, r] * ROOM_CAPACITY_COST_FACTOR
+        sum_cd = self.sum_cd_view
+        sum_cd[c, d] -= 1
+        if sum_cd[c, d] == 0:
+            self._update_working_days(c, -1)
+        sum_cr = self.sum_cr_view
+        sum_cr[c, r] -= 1
+        if sum_cr[c, r] == 0:
+            self._update_used_rooms(c, -1)
+
+        sum_qds = self.sum_qds_view
+        for q in model.course_curricula[c]:
+            sum_qds[q, d, s] -= 1
+            if sum_qds[q, d, s] > 0:
+                self.n_conflicts -= 1
+            else:
+                self._update_slots(q, d, self.slots_qd_view[q, d] & ~(1 << s))
+
+        sum_tds = self.sum_tds_view
+        sum_tds[t, d, s] -= 1
+        if sum_tds[t, d, s] > 0:
+            self.n_conflicts -= 1
+        sum_rds = self.sum_rds_view
+        sum_rds[r, d, s] -= 1
+        if sum_rds[r, d, s] > 0:
+            self.n_conflicts -= 1
+        if not model.availability_view[c, d, s]:
+            self.n_unavailable -= 1
+        self.n_assigned -= 1
+
+    def lecture_at(self, r, d, s):
+        # Lecture assigned to the (room, day, slot) cell, or -1 if it is empty
+        return self.l_rds_view[(r * self.D + d) * self.S + s]
+
+    def _fill_cell(self, cell):
+        # Remove the cell from the empty cells by swapping it with the last one
+        empty_cells = self.empty_cells_view
+        empty_pos = self.empty_pos_view
+        pos = empty_pos[cell]
+        if pos >= self.n_empty:
             return
-        r, d, s = self.assignments[l]
-        lecture = self.model.lectures[l]
-        c = lecture.course.index
-        self.assignments[l] = None
-        self.timetable_crds[c, r, d, s] = 0
-        self.sum_cd[c][d] -= 1
-        self.sum_cr[c][r] -= 1
-        for q_id in self.model.curriculas_of_course[lecture.course.id]:
-            q = self.model.curricula_by_id[q_id].index
-            self.sum_qds[q][d][s] -= 1
-        self.l_rds[r][d][s] = -1
+        last = self.n_empty - 1
+        other = empty_cells[last]
+        empty_cells[pos] = other
+        empty_pos[other] = pos
+        empty_cells[last] = cell
+        empty_pos[cell] = last
+        self.n_empty = last
+
+    def _empty_cell(self, cell):
+        # Append the cell to the empty cells, swapping it with the first filled one
+        empty_cells = self.empty_cells_view
+        empty_pos = self.empty_pos_view
+        pos = empty_pos[cell]
+        first = self.n_empty
+        if pos < first:
+            return
+        other = empty_cells[first]
+        empty_cells[pos] = other
+        empty_pos[other] = pos
+        empty_cells[first] = cell
+        empty_pos[cell] = first
+        self.n_empty = first + 1
+
+    def _update_working_days(self, c, delta):
+        required = self.model.course_min_working_days_view[c]
+        working_days = self.working_days_c_view
+        before = max(0, required - working_days[c])
+        working_days[c] += delta
+        after = max(0, required - working_days[c])
+        self.min_working_days_cost += (after - before) * MIN_WORKING_DAYS_COST_FACTOR
+
+    def _update_used_rooms(self, c, delta):
+        used_rooms = self.used_rooms_c_view
+        before = max(0, used_rooms[c] - 1)
+        used_rooms[c] += delta
+        after = max(0, used_rooms[c] - 1)
+        self.room_stability_cost += (after - before) * ROOM_STABILITY_COST_FACTOR
+
+    def _update_slots(self, q, d, mask):
+        isolated = self.model.isolated_by_mask
+        before = isolated[self.slots_qd_view[q, d]]
+        self.slots_qd_view[q, d] = mask
+        self.curriculum_compactness_cost += (isolated[mask] - before) * CURRICULUM_COMPACTNESS_COST_FACTOR
+
+    def total_cost(self):
+        # O(1) read of the running cost components
+        return (
+            self.room_capacity_cost +
+            self.min_working_days_cost +
+            self.curriculum_compactness_cost +
+            self.room_stability_cost
+        )
+
+    def audit_cost(self):
+        # Check the running cost components against a full recomputation
+        components = self.compute_cost_components()
+        running = {
+            'room_capacity_cost': self.room_capacity_cost,
+            'min_working_days_cost': self.min_working_days_cost,
+            'curriculum_compactness_cost': self.curriculum_compactness_cost,
+            'room_stability_cost': self.room_stability_cost,
+            'cost': self.total_cost()
+        }
+        assert running == components, f"Running cost {running} differs from recomputed cost {components}"
+        empty = np.sort(self.empty_cells[:self.n_empty])
+        assert np.array_equal(empty, np.flatnonzero(self.l_rds < 0)), "Empty cell index out of date"
+        assert self.zobrist == self.compute_zobrist(), "Zobrist hash out of date"
+        return components['cost']
+
+    def compute_zobrist(self):
+        # Full recomputation of the Zobrist hash
+        cells = np.flatnonzero(self.l_rds >= 0)
+        keys = self.model.zobrist_keys[self.model.lecture_course[self.l_rds[cells]], cells]
+        return int(np.bitwise_xor.reduce(keys)) if len(keys) else 0
 
     def satisfy_hard_constraints_after_swap(self, mv):
+        if mv.l2 == mv.l1:
+            return self.satisfy_hard_constraints()
+
         orig_l1 = self.assignments[mv.l1]
-        orig_l2 = self.assignments[mv.helper['l2']] if mv.helper['l2'] is not None and mv.helper['l2'] >= 0 else None
+        orig_l2 = self.assignments[mv.l2] if mv.l2 is not None and mv.l2 >= 0 else None
 
         self.unassign_lecture(mv.l1)
-        if mv.helper['l2'] is not None and mv.helper['l2'] >= 0:
-            self.unassign_lecture(mv.helper['l2'])
+        if mv.l2 is not None and mv.l2 >= 0:
+            self.unassign_lecture(mv.l2)
 
         self.assign_lecture(mv.l1, mv.r2, mv.d2, mv.s2)
-        if mv.helper['l2'] is not None and mv.helper['l2'] >= 0:
-            self.assign_lecture(mv.helper['l2'], mv.helper['r1'], mv.helper['d1'], mv.helper['s1'])
+        if mv.l2 is not None and mv.l2 >= 0:
+            self.assign_lecture(mv.l2, mv.r1, mv.d1, mv.s1)
 
         feasible = self.satisfy_hard_constraints()
 
         self.unassign_lecture(mv.l1)
-        if mv.helper['l2'] is not None and mv.helper['l2'] >= 0:
-            self.unassign_lecture(mv.helper['l2'])
+        if mv.l2 is not None and mv.l2 >= 0:
+            self.unassign_lecture(mv.l2)
 
         self.assign_lecture(mv.l1, orig_l1.r, orig_l1.d, orig_l1.s)
         if orig_l2:
-            self.assign_lecture(mv.helper['l2'], orig_l2.r, orig_l2.d, orig_l2.s)
+            self.assign_lecture(mv.l2, orig_l2.r, orig_l2.d, orig_l2.s)
 
         return feasible
 
+    def is_feasible(self):
+        # O(1) equivalent of satisfy_hard_constraints() based on the occupancy counters
+        return self.n_assigned == self.L and self.n_conflicts == 0 and self.n_unavailable == 0
+
     def satisfy_hard_constraints(self):
         return (
             self._satisfy_lectures() and
@@ -85,96 +379,61 @@ class Solution:
             self._satisfy_availabilities()
         )
 
+    # The full checks below recompute the occupancies from the per-lecture
+    # arrays, independently of the incremental counters
+
+    def _course_periods(self):
+        # Number of lectures of each course in each period, shape (C, D * S)
+        counts = np.zeros((self.C, self.D * self.S), dtype=int)
+        np.add.at(counts, (self.model.lecture_course, self.lecture_d.astype(int) * self.S + self.lecture_s), 1)
+        return counts
+
     def _satisfy_lectures(self):
-        for c in range(self.C):
-            total = np.sum(self.timetable_crds[c])
-            if total != self.model.courses[c].n_lectures:
-                return False
-            for d in range(self.D):
-                for s in range(self.S):
-                    if np.sum(self.timetable_crds[c, :, d, s]) > 1:
-                        return False
-        return True
+        if np.any(self.lecture_r < 0):
+            return False
+        return not np.any(self._course_periods() > 1)
 
     def _satisfy_room_occupancy(self):
-        for r in range(self.R):
-            for d in range(self.D):
-                for s in range(self.S):
-                    if np.sum(self.timetable_crds[:, r, d, s]) > 1:
-                        return False
-        return True
+        counts = np.zeros((self.R, self.D * self.S), dtype=int)
+        np.add.at(counts, (self.lecture_r, self.lecture_d.astype(int) * self.S + self.lecture_s), 1)
+        return not np.any(counts > 1)
 
     def _satisfy_conflicts(self):
-        for q in range(self.Q):
-            course_ids = self.model.curriculas[q].courses_ids
-            course_indices = [self.model.course_by_id[cid].index for cid in course_ids]
-            for d in range(self.D):
-                for s in range(self.S):
-                    if sum(self.timetable_crds[c, :, d, s].any() for c in course_indices) > 1:
-                        return False
-
-        for t in range(self.T):
-            teacher = self.model.teachers[t]
-            course_ids = self.model.courses_of_teacher[teacher.id]
-            course_indices = [self.model.course_by_id[cid].index for cid in course_ids]
-            for d in range(self.D):
-                for s in range(self.S):
-                    if sum(self.timetable_crds[c, :, d, s].any() for c in course_indices) > 1:
-                        return False
-        return True
+        course_used = (self._course_periods() > 0).astype(int)
+
+        if np.any(self.model.curriculum_course @ course_used > 1):
+            return False
+
+        teachers = np.zeros((self.T, self.C), dtype=int)
+        teachers[self.model.course_teacher, np.arange(self.C)] = 1
+        return not np.any(teachers @ course_used > 1)
 
     def _satisfy_availabilities(self):
-        for c in range(self.C):
-            cid = self.model.courses[c].id
-            for d in range(self.D):
-                for s in range(self.S):
-                    if not self.model.is_available(cid, d, s):
-                        if self.timetable_crds[c, :, d, s].any():
-                            return False
-        return True
+        assigned = self.lecture_r >= 0
+        c = self.model.lecture_course[assigned]
+        return bool(np.all(self.model.availability_cds[c, self.lecture_d[assigned], self.lecture_s[assigned]]))
 
-    def compute_total_cost(self):
-        room_capacity_cost = 0
-        min_working_days_cost = 0
-        curriculum_compactness_cost = 0
-        room_stability_cost = 0
-
-        # Room capacity cost
-        for c in range(self.C):
-            n_students = self.model.courses[c].n_students
-            for r in range(self.R):
-                for d in range(self.D):
-                    for s in range(self.S):
-                        if self.timetable_crds[c, r, d, s]:
-                            capacity = self.model.rooms[r].capacity
-                            if n_students > capacity:
-                                room_capacity_cost += (n_students - capacity) * ROOM_CAPACITY_COST_FACTOR
+    def compute_cost_components(self):
+        model = self.model
+
+        # Room capacity cost: lectures per (course, room) times the capacity excess
+        room_capacity_cost = int(np.sum(self.sum_cr * model.capacity_excess_cr)) * ROOM_CAPACITY_COST_FACTOR
 
         # Min working days cost
-        for c in range(self.C):
-            working_days = sum(1 for d in range(self.D) if self.sum_cd[c][d] > 0)
-            required_days = self.model.courses[c].min_working_days
-            if working_days < required_days:
-                min_working_days_cost += (required_days - working_days) * MIN_WORKING_DAYS_COST_FACTOR
-
-        # Curriculum compactness cost
-        for q in range(self.Q):
-            for d in range(self.D):
-                for s in range(self.S):
-                    if self.sum_qds[q][d][s] > 0:
-                        neighbors = 0
-                        if s > 0:
-                            neighbors += self.sum_qds[q][d][s - 1]
-                        if s + 1 < self.S:
-                            neighbors += self.sum_qds[q][d][s + 1]
-                        if neighbors == 0:
-                            curriculum_compactness_cost += CURRICULUM_COMPACTNESS_COST_FACTOR
+        working_days = np.count_nonzero(self.sum_cd, axis=1)
+        missing_days = np.maximum(0, model.course_min_working_days - working_days)
+        min_working_days_cost = int(np.sum(missing_days)) * MIN_WORKING_DAYS_COST_FACTOR
+
+        # Curriculum compactness cost: occupied slots whose neighbouring slots are both empty
+        occupied = self.sum_qds > 0
+        isolated = occupied.copy()
+        isolated[:, :, 1:] &= ~occupied[:, :, :-1]
+        isolated[:, :, :-1] &= ~occupied[:, :, 1:]
+        curriculum_compactness_cost = int(np.count_nonzero(isolated)) * CURRICULUM_COMPACTNESS_COST_FACTOR
 
         # Room stability cost
-        for c in range(self.C):
-            room_count = sum(1 for r in range(self.R) if self.sum_cr[c][r] > 0)
-            if room_count > 1:
-                room_stability_cost += (room_count - 1) * ROOM_STABILITY_COST_FACTOR
+        room_count = np.count_nonzero(self.sum_cr, axis=1)
+        room_stability_cost = int(np.sum(np.maximum(0, room_count - 1))) * ROOM_STABILITY_COST_FACTOR
 
         total_cost = (
             room_capacity_cost +
@@ -183,31 +442,84 @@ class Solution:
             room_stability_cost
         )
 
-        # print(f"[COST BREAKDOWN] RoomCapacity: {room_capacity_cost}, "
-        #     f"MinWorkingDays: {min_working_days_cost}, "
-        #     f"CurriculumCompactness: {curriculum_compactness_cost}, "
-        #     f"RoomStability: {room_stability_cost} => Total: {total_cost}")
-
-        return total_cost
+        return {
+            'room_capacity_cost': room_capacity_cost,
+            'min_working_days_cost': min_working_days_cost,
+            'curriculum_compactness_cost': curriculum_compactness_cost,
+            'room_stability_cost': room_stability_cost,
+            'cost': total_cost
+        }
 
+    def compute_total_cost(self):
+        return self.compute_cost_components()['cost']
 
     def copy_from(self, other):
-        for l, a in enumerate(other.assignments):
-            if a is not None:
-                self.assign_lecture(l, a.r, a.d, a.s)
+        # Bulk copy of the whole state: the previous content is fully replaced.
+        # Must not be used inside a transaction of self.
+        np.copyto(self.buffer, other.buffer)
+        for name in SOLUTION_SCALARS:
+            setattr(self, name, getattr(other, name))
+
+    def export_assignments(self):
+        # Compact (3, L) int16 array of the room, day and slot of each lecture,
+        # e.g. to send a solution to another process
+        return np.stack((self.lecture_r, self.lecture_d, self.lecture_s))
+
+    def import_assignments(self, assignments):
+        # Rebuild the full state from an array produced by export_assignments()
+        self.clear()
+        for l, (r, d, s) in enumerate(zip(*assignments.tolist())):
+            if r >= 0:
+                self.assign_lecture(l, r, d, s)
+
+    def clone(self):
+        solution = self.pool.acquire() if self.pool is not None else Solution(self.model)
+        solution.copy_from(self)
+        return solution
+
+    def release(self):
+        # Give the buffer back to the pool the solution was taken from, if any
+        if self.pool is not None:
+            self.pool.release(self)
 
     def to_string(self):
         output = []
-        for l, a in enumerate(self.assignments):
-            if a is not None:
+        for l, (r, d, s) in enumerate(zip(self.lecture_r.tolist(), self.lecture_d.tolist(), self.lecture_s.tolist())):
+            if r >= 0:
                 course = self.model.lectures[l].course.id
-                room = self.model.rooms[a.r].id
-                output.append(f"{course} {room} {a.d} {a.s}")
+                room = self.model.rooms[r].id
+                output.append(f"{course} {room} {d} {s}")
         return "\n".join(output)
-    
-    def sum_qds_for_course(self, c, d, s, delta):
-        course_id = self.model.courses[c].id
-        for q_id in self.model.curriculas_of_course[course_id]:
-            q = self.model.curricula_by_id[q_id].index
-            self.sum_qds[q][d][s] += delta
 
+
+class SolutionPool:
+    """
+    Preallocated solutions whose buffers are the rows of one contiguous
+    (capacity, buffer size) array. Solutions cloned from a pooled solution are
+    taken from the same pool, so cloning does not allocate.
+    """
+    def __init__(self, model, capacity):
+        self.model = model
+        layout, size = solution_layout(model)
+        self.buffers = np.zeros((capacity, size), dtype=np.uint8)
+        self.solutions = [None] * capacity
+        self.free = list(range(capacity - 1, -1, -1))
+
+    def acquire(self):
+        if not self.free:
+            # Exhausted: fall back to a standalone solution
+            solution = Solution(self.model)
+            solution.pool = self
+            return solution
+
+        index = self.free.pop()
+        solution = self.solutions[index]
+        if solution is None:
+            solution = Solution(self.model, buffer=self.buffers[index], pool=self)
+            solution.pool_index = index
+            self.solutions[index] = solution
+        return solution
+
+    def release(self, solution):
+        if solution.pool_index is not None:
+            self.free.append(solution.pool_index)
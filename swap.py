@@ -1,226 +1,304 @@
 import random
-from utils.indexing import INDEX2, INDEX3
+import numpy as np
 from solution import ROOM_CAPACITY_COST_FACTOR, MIN_WORKING_DAYS_COST_FACTOR, CURRICULUM_COMPACTNESS_COST_FACTOR, ROOM_STABILITY_COST_FACTOR
 
 class SwapMove:
+    # The lecture l1 moves to the cell (r2, d2, s2). The helper fields c1, r1,
+    # d1, s1 (course and cell of l1), l2 and c2 (lecture in the target cell and
+    # its course, -1 if empty) are filled in by swap_move_compute_helper
+    __slots__ = ('l1', 'r2', 'd2', 's2', 'c1', 'r1', 'd1', 's1', 'l2', 'c2')
+
     def __init__(self, l1, r2, d2, s2):
         self.l1 = l1
         self.r2 = r2
         self.d2 = d2
         self.s2 = s2
-        self.helper = {
-            'c1': None, 'r1': None, 'd1': None, 's1': None,
-            'l2': None, 'c2': None
-        }
+        self.c1 = self.r1 = self.d1 = self.s1 = self.l2 = self.c2 = None
 
 class SwapResult:
+    # Feasibility of a move and its cost delta, total and per component
+    __slots__ = ('feasible', 'room_capacity_cost', 'min_working_days_cost',
+                 'curriculum_compactness_cost', 'room_stability_cost', 'cost')
+
     def __init__(self):
         self.feasible = False
-        self.delta = {
-            'room_capacity_cost': 0,
-            'min_working_days_cost': 0,
-            'curriculum_compactness_cost': 0,
-            'room_stability_cost': 0,
-            'cost': 0
-        }
+        self.room_capacity_cost = 0
+        self.min_working_days_cost = 0
+        self.curriculum_compactness_cost = 0
+        self.room_stability_cost = 0
+        self.cost = 0
 
 def swap_move_compute_helper(sol, mv):
     l1 = mv.l1
-    lecture = sol.model.lectures[l1]
-    a = sol.assignments[l1]
-    mv.helper['c1'] = lecture.course.index
-    mv.helper['r1'] = a.r
-    mv.helper['d1'] = a.d
-    mv.helper['s1'] = a.s
-
-    mv.helper['l2'] = sol.l_rds[mv.r2][mv.d2][mv.s2]
-    if mv.helper['l2'] >= 0:
-        mv.helper['c2'] = sol.model.lectures[mv.helper['l2']].course.index
-    else:
-        mv.helper['c2'] = -1
-
-def swap_move_is_effective(mv):
-    return mv.helper['c1'] != mv.helper['c2']
-
-def swap_move_do(sol, mv):
-    assert sol.assignments[mv.l1].r == mv.helper['r1']
-    assert sol.assignments[mv.l1].d == mv.helper['d1']
-    assert sol.assignments[mv.l1].s == mv.helper['s1']
+    lecture_course = sol.model.lecture_course_view
+    mv.c1 = lecture_course[l1]
+    mv.r1 = sol.lecture_r_view[l1]
+    mv.d1 = sol.lecture_d_view[l1]
+    mv.s1 = sol.lecture_s_view[l1]
 
-    sol.unassign_lecture(mv.l1)
-    if mv.helper['l2'] >= 0:
-        sol.unassign_lecture(mv.helper['l2'])
+    # sol.lecture_at(r2, d2, s2), inlined
+    l2 = sol.l_rds_view[(mv.r2 * sol.D + mv.d2) * sol.S + mv.s2]
+    mv.l2 = l2
+    mv.c2 = lecture_course[l2] if l2 >= 0 else -1
 
-    sol.assign_lecture(mv.l1, mv.r2, mv.d2, mv.s2)
-    if mv.helper['l2'] >= 0:
-        sol.assign_lecture(mv.helper['l2'], mv.helper['r1'], mv.helper['d1'], mv.helper['s1'])
-
-def compute_room_capacity_cost(sol, c1, r1, r2):
-    if c1 < 0:
-        return 0
-    students = sol.model.courses[c1].n_students
-    cap1 = sol.model.rooms[r1].capacity
-    cap2 = sol.model.rooms[r2].capacity
-    cost = min(0, cap1 - students) + max(0, students - cap2)
-    return cost * ROOM_CAPACITY_COST_FACTOR
-
-def compute_min_working_days_cost(sol, c1, d1, c2, d2):
-    if c1 < 0 or c1 == c2:
-        return 0
-
-    model = sol.model
-    prev_days = sum(1 for d in range(model.n_days) if sol.sum_cd[c1][d] > 0)
-
-    delta_cd = sol.sum_cd[c1].copy()
-    delta_cd[d1] -= 1
-    delta_cd[d2] += 1
-    curr_days = sum(1 for d in range(model.n_days) if delta_cd[d] > 0)
-
-    required = model.courses[c1].min_working_days
-    prev_cost = max(0, required - prev_days)
-    curr_cost = max(0, required - curr_days)
-    
-    return (curr_cost - prev_cost) * MIN_WORKING_DAYS_COST_FACTOR
-
-def compute_room_stability_cost(sol, c1, r1, c2, r2):
-    if c1 < 0 or r1 == r2 or c1 == c2:
-        return 0
+def swap_move_is_effective(mv):
+    return mv.c1 != mv.c2
+
+def swap_move_is_feasible(sol, mv):
+    """
+    Incremental equivalent of sol.satisfy_hard_constraints_after_swap(mv).
+
+    Only the counters of the two cells touched by the move are inspected, so the
+    check costs O(number of curricula of c1 and c2) instead of a full scan. On
+    a feasible solution no counter exceeds one, so leaving a cell never
+    resolves a conflict and the check stops at the first conflict created.
+    """
+    if sol.n_assigned != sol.L:
+        return False
+    c1, c2 = mv.c1, mv.c2
+    feasible = sol.n_conflicts == 0 and sol.n_unavailable == 0
+    if c1 == c2:
+        return feasible
 
     model = sol.model
-    before_rooms = sum(1 for r in sol.sum_cr[c1] if r > 0)
-
-    simulated = sol.sum_cr[c1].copy()
-    simulated[r1] -= 1
-    simulated[r2] += 1
-    after_rooms = sum(1 for r in simulated if r > 0)
+    r1, d1, s1 = mv.r1, mv.d1, mv.s1
+    r2, d2, s2 = mv.r2, mv.d2, mv.s2
+    moved = d1 != d2 or s1 != s2
+
+    if feasible:
+        # The target cell of a move to an empty cell is free of other rooms'
+        # lectures by definition, so only the periods can conflict
+        if not moved:
+            return True
+        available = model.availability_view
+        sum_tds = sol.sum_tds_view
+        sum_qds = sol.sum_qds_view
+        t1 = model.course_teacher_view[c1]
+        q1 = model.course_curricula[c1]
+        if not available[c1, d2, s2]:
+            return False
+        if c2 < 0:
+            if sum_tds[t1, d2, s2]:
+                return False
+            for q in q1:
+                if sum_qds[q, d2, s2]:
+                    return False
+            return True
 
-    cost = max(0, after_rooms - 1) - max(0, before_rooms - 1)
-    return cost * ROOM_STABILITY_COST_FACTOR
+        if not available[c2, d1, s1]:
+            return False
+        t2 = model.course_teacher_view[c2]
+        if t1 != t2 and (sum_tds[t1, d2, s2] or sum_tds[t2, d1, s1]):
+            return False
+        q2 = model.course_curricula[c2]
+        for q in q1:
+            if sum_qds[q, d2, s2] and q not in q2:
+                return False
+        for q in q2:
+            if sum_qds[q, d1, s1] and q not in q1:
+                return False
+        return True
 
-def compute_curriculum_compactness_cost(sol, c1, d1, s1, c2, d2, s2):
-    if c1 < 0 or c1 == c2:
-        return 0
+    n_conflicts = sol.n_conflicts
+    n_unavailable = sol.n_unavailable
 
-    model = sol.model
-    delta_cost = 0
+    # Each term is the change in the conflict count when one occupant leaves
+    # a counter (-1 if others remain) or enters it (+1 if it was occupied)
 
-    for q_id in model.curriculas_of_course[model.courses[c1].id]:
-        q = model.curricula_by_id[q_id].index
+    # Rooms: a swap with another lecture leaves room occupancy unchanged
+    if c2 < 0:
+        sum_rds = sol.sum_rds_view
+        n_conflicts += (sum_rds[r2, d2, s2] > 0) - (sum_rds[r1, d1, s1] > 1)
 
+    if moved:
+        t1 = model.course_teacher_view[c1]
+        q1 = model.course_curricula[c1]
         if c2 >= 0:
-            c2_id = model.courses[c2].id
-            if c2_id in model.curriculas_of_course and q_id in model.curriculas_of_course[c2_id]:
-                continue
+            t2 = model.course_teacher_view[c2]
+            q2 = model.course_curricula[c2]
+        else:
+            t2 = -1
+            q2 = ()
+
+        # Teachers
+        if t1 != t2:
+            sum_tds = sol.sum_tds_view
+            n_conflicts += (sum_tds[t1, d2, s2] > 0) - (sum_tds[t1, d1, s1] > 1)
+            if t2 >= 0:
+                n_conflicts += (sum_tds[t2, d1, s1] > 0) - (sum_tds[t2, d2, s2] > 1)
+
+        # Curricula shared by both courses keep their occupancy
+        sum_qds = sol.sum_qds_view
+        for q in q1:
+            if q not in q2:
+                n_conflicts += (sum_qds[q, d2, s2] > 0) - (sum_qds[q, d1, s1] > 1)
+        for q in q2:
+            if q not in q1:
+                n_conflicts += (sum_qds[q, d1, s1] > 0) - (sum_qds[q, d2, s2] > 1)
+
+        # Availabilities
+        available = model.availability_view
+        n_unavailable += available[c1, d1, s1] - available[c1, d2, s2]
+        if c2 >= 0:
+            n_unavailable += available[c2, d2, s2] - available[c2, d1, s1]
 
-        sum_qds = sol.sum_qds[q].copy()
-        sum_qds[d1][s1] -= 1
-        sum_qds[d2][s2] += 1
+    return n_conflicts == 0 and n_unavailable == 0
 
-        def is_isolated(d, s):
-            if not (0 <= s < model.n_slots):
-                return False
-            if sum_qds[d][s] <= 0:
-                return False
-            left = sum_qds[d][s - 1] if s > 0 else 0
-            right = sum_qds[d][s + 1] if s + 1 < model.n_slots else 0
-            return left == 0 and right == 0
+def swap_move_do(sol, mv):
+    assert sol.lecture_r_view[mv.l1] == mv.r1
+    assert sol.lecture_d_view[mv.l1] == mv.d1
+    assert sol.lecture_s_view[mv.l1] == mv.s1
+
+    # Moving a lecture onto its own cell is a no-op
+    if mv.l2 == mv.l1:
+        return
 
-        before = is_isolated(d1, s1)
-        after = is_isolated(d2, s2)
-        delta_cost += int(after) - int(before)
+    sol.unassign_lecture(mv.l1)
+    if mv.l2 >= 0:
+        sol.unassign_lecture(mv.l2)
 
-    return delta_cost * CURRICULUM_COMPACTNESS_COST_FACTOR
+    sol.assign_lecture(mv.l1, mv.r2, mv.d2, mv.s2)
+    if mv.l2 >= 0:
+        sol.assign_lecture(mv.l2, mv.r1, mv.d1, mv.s1)
 
 def swap_move_compute_cost(sol, mv, result):
-    simulate_swap_delta(sol, mv)
+    """
+    Exact cost delta of the move, computed from the current counters of the
+    solution without modifying them.
+
+    The lecture of course c1 moves from (r1, d1, s1) to (r2, d2, s2) while the
+    lecture of course c2, if any, moves the opposite way. Each component only
+    depends on the counters of these two cells, so no state is copied.
+    """
+    c1, c2 = mv.c1, mv.c2
+
+    if c1 == c2:
+        # Exchanging two lectures of the same course leaves the timetable unchanged
+        result.room_capacity_cost = 0
+        result.min_working_days_cost = 0
+        result.room_stability_cost = 0
+        result.curriculum_compactness_cost = 0
+        result.cost = 0
+        return
 
-    result.delta['room_capacity_cost'] = (
-        compute_room_capacity_cost(sol, mv.helper['c1'], mv.helper['r1'], mv.r2) +
-        compute_room_capacity_cost(sol, mv.helper['c2'], mv.r2, mv.helper['r1'])
-    )
+    model = sol.model
+    r1, d1, s1 = mv.r1, mv.d1, mv.s1
+    r2, d2, s2 = mv.r2, mv.d2, mv.s2
+
+    room_capacity_cost = 0
+    room_stability_cost = 0
+    if r1 != r2:
+        excess = model.capacity_excess_view
+        sum_cr = sol.sum_cr_view
+        used_rooms = sol.used_rooms_c_view
+
+        # Used rooms change by at most one, when a room is left without one
+        # being entered or the reverse; the penalty is max(0, rooms - 1)
+        room_capacity_cost = excess[c1, r2] - excess[c1, r1]
+        left, entered = sum_cr[c1, r1] == 1, sum_cr[c1, r2] == 0
+        if entered and not left:
+            room_stability_cost = used_rooms[c1] >= 1
+        elif left and not entered:
+            room_stability_cost = -(used_rooms[c1] >= 2)
 
-    result.delta['min_working_days_cost'] = (
-        compute_min_working_days_cost(sol, mv.helper['c1'], mv.helper['d1'], mv.helper['c2'], mv.d2) +
-        compute_min_working_days_cost(sol, mv.helper['c2'], mv.d2, mv.helper['c1'], mv.helper['d1'])
-    )
+        if c2 >= 0:
+            room_capacity_cost += excess[c2, r1] - excess[c2, r2]
+            left, entered = sum_cr[c2, r2] == 1, sum_cr[c2, r1] == 0
+            if entered and not left:
+                room_stability_cost += used_rooms[c2] >= 1
+            elif left and not entered:
+                room_stability_cost -= used_rooms[c2] >= 2
+
+        room_capacity_cost *= ROOM_CAPACITY_COST_FACTOR
+        room_stability_cost *= ROOM_STABILITY_COST_FACTOR
+
+    min_working_days_cost = 0
+    if d1 != d2:
+        sum_cd = sol.sum_cd_view
+        working_days = sol.working_days_c_view
+        min_working_days = model.course_min_working_days_view
+
+        # Working days change by at most one, when a day is left without one
+        # being entered or the reverse; the penalty is max(0, required - days)
+        left, entered = sum_cd[c1, d1] == 1, sum_cd[c1, d2] == 0
+        if entered and not left:
+            min_working_days_cost = -(working_days[c1] < min_working_days[c1])
+        elif left and not entered:
+            min_working_days_cost = working_days[c1] <= min_working_days[c1]
 
-    result.delta['room_stability_cost'] = (
-        compute_room_stability_cost(sol, mv.helper['c1'], mv.helper['r1'], mv.helper['c2'], mv.r2) +
-        compute_room_stability_cost(sol, mv.helper['c2'], mv.r2, mv.helper['c1'], mv.helper['r1'])
+        if c2 >= 0:
+            left, entered = sum_cd[c2, d2] == 1, sum_cd[c2, d1] == 0
+            if entered and not left:
+                min_working_days_cost -= working_days[c2] < min_working_days[c2]
+            elif left and not entered:
+                min_working_days_cost += working_days[c2] <= min_working_days[c2]
+
+        min_working_days_cost *= MIN_WORKING_DAYS_COST_FACTOR
+
+    curriculum_compactness_cost = 0
+    if d1 != d2 or s1 != s2:
+        # A lecture of each curriculum of c1 moves from (d1, s1) to (d2, s2)
+        # and one of each curriculum of c2 the opposite way; the curricula
+        # shared by both keep their occupancy. The occupied-slot masks only
+        # change when a counter crosses zero
+        isolated = model.isolated_by_mask
+        sum_qds = sol.sum_qds_view
+        slots_qd = sol.slots_qd_view
+        bit1 = 1 << s1
+        bit2 = 1 << s2
+        q1 = model.course_curricula[c1]
+        q2 = model.course_curricula[c2] if c2 >= 0 else ()
+        for q in q1:
+            if q in q2:
+                continue
+            before1 = slots_qd[q, d1]
+            after1 = before1 & ~bit1 if sum_qds[q, d1, s1] == 1 else before1
+            if d1 == d2:
+                curriculum_compactness_cost += isolated[after1 | bit2] - isolated[before1]
+            else:
+                before2 = slots_qd[q, d2]
+                curriculum_compactness_cost += (isolated[after1] - isolated[before1] +
+                                                isolated[before2 | bit2] - isolated[before2])
+        for q in q2:
+            if q in q1:
+                continue
+            before2 = slots_qd[q, d2]
+            after2 = before2 & ~bit2 if sum_qds[q, d2, s2] == 1 else before2
+            if d1 == d2:
+                curriculum_compactness_cost += isolated[after2 | bit1] - isolated[before2]
+            else:
+                before1 = slots_qd[q, d1]
+                curriculum_compactness_cost += (isolated[after2] - isolated[before2] +
+                                                isolated[before1 | bit1] - isolated[before1])
+        curriculum_compactness_cost *= CURRICULUM_COMPACTNESS_COST_FACTOR
+
+    result.room_capacity_cost = room_capacity_cost
+    result.min_working_days_cost = min_working_days_cost
+    result.room_stability_cost = room_stability_cost
+    result.curriculum_compactness_cost = curriculum_compactness_cost
+    result.cost = (
+        room_capacity_cost +
+        min_working_days_cost +
+        room_stability_cost +
+        curriculum_compactness_cost
     )
 
-    result.delta['curriculum_compactness_cost'] = (
-        compute_curriculum_compactness_cost(sol, mv.helper['c1'], mv.helper['d1'], mv.helper['s1'],
-                                            mv.helper['c2'], mv.d2, mv.s2) +
-        compute_curriculum_compactness_cost(sol, mv.helper['c2'], mv.d2, mv.s2,
-                                            mv.helper['c1'], mv.helper['d1'], mv.helper['s1'])
-    )
+    # print(f"[DELTA DEBUG] RC={room_capacity_cost}, "
+    #       f"MWD={min_working_days_cost}, "
+    #       f"RS={room_stability_cost}, "
+    #       f"CC={curriculum_compactness_cost}, "
+    #       f"Total Delta={result.cost}")
 
-    result.delta['cost'] = sum(result.delta.values())
-
-    # print(f"[DELTA DEBUG] RC={result.delta['room_capacity_cost']}, "
-    #       f"MWD={result.delta['min_working_days_cost']}, "
-    #       f"RS={result.delta['room_stability_cost']}, "
-    #       f"CC={result.delta['curriculum_compactness_cost']}, "
-    #       f"Total Delta={result.delta['cost']}")
-
-    undo_simulate_swap(sol, mv)
-
-def simulate_swap_delta(sol, mv):
-    c1 = mv.helper['c1']
-    sol.sum_cd[c1][mv.helper['d1']] -= 1
-    sol.sum_cr[c1][mv.helper['r1']] -= 1
-    sol.l_rds[mv.helper['r1']][mv.helper['d1']][mv.helper['s1']] = -1
-    sol.sum_qds_for_course(c1, mv.helper['d1'], mv.helper['s1'], -1)
-
-    if mv.helper['l2'] is not None and mv.helper['l2'] >= 0:
-        c2 = mv.helper['c2']
-        sol.sum_cd[c2][mv.d2] -= 1
-        sol.sum_cr[c2][mv.r2] -= 1
-        sol.l_rds[mv.r2][mv.d2][mv.s2] = -1
-        sol.sum_qds_for_course(c2, mv.d2, mv.s2, -1)
-
-    sol.sum_cd[c1][mv.d2] += 1
-    sol.sum_cr[c1][mv.r2] += 1
-    sol.l_rds[mv.r2][mv.d2][mv.s2] = mv.l1
-    sol.sum_qds_for_course(c1, mv.d2, mv.s2, +1)
-
-    if mv.helper['l2'] is not None and mv.helper['l2'] >= 0:
-        sol.sum_cd[c2][mv.helper['d1']] += 1
-        sol.sum_cr[c2][mv.helper['r1']] += 1
-        sol.l_rds[mv.helper['r1']][mv.helper['d1']][mv.helper['s1']] = mv.helper['l2']
-        sol.sum_qds_for_course(c2, mv.helper['d1'], mv.helper['s1'], +1)
-
-def undo_simulate_swap(sol, mv):
-    c1 = mv.helper['c1']
-    sol.sum_cd[c1][mv.d2] -= 1
-    sol.sum_cr[c1][mv.r2] -= 1
-    sol.l_rds[mv.r2][mv.d2][mv.s2] = -1
-    sol.sum_qds_for_course(c1, mv.d2, mv.s2, -1)
-
-    sol.sum_cd[c1][mv.helper['d1']] += 1
-    sol.sum_cr[c1][mv.helper['r1']] += 1
-    sol.l_rds[mv.helper['r1']][mv.helper['d1']][mv.helper['s1']] = mv.l1
-    sol.sum_qds_for_course(c1, mv.helper['d1'], mv.helper['s1'], +1)
-
-    if mv.helper['l2'] is not None and mv.helper['l2'] >= 0:
-        c2 = mv.helper['c2']
-        sol.sum_cd[c2][mv.helper['d1']] -= 1
-        sol.sum_cr[c2][mv.helper['r1']] -= 1
-        sol.l_rds[mv.helper['r1']][mv.helper['d1']][mv.helper['s1']] = -1
-        sol.sum_qds_for_course(c2, mv.helper['d1'], mv.helper['s1'], -1)
-
-        sol.sum_cd[c2][mv.d2] += 1
-        sol.sum_cr[c2][mv.r2] += 1
-        sol.l_rds[mv.r2][mv.d2][mv.s2] = mv.helper['l2']
-        sol.sum_qds_for_course(c2, mv.d2, mv.s2, +1)
-
-def swap_predict(sol, mv, require_feasibility=True, compute_cost=True):
+def swap_predict(sol, mv, require_feasibility=True, compute_cost=True, result=None):
+    # A caller evaluating many moves may pass the SwapResult to fill in
     swap_move_compute_helper(sol, mv)
-    result = SwapResult()
+    if result is None:
+        result = SwapResult()
+    else:
+        result.feasible = False
 
     if require_feasibility:
-        result.feasible = sol.satisfy_hard_constraints_after_swap(mv)
+        result.feasible = swap_move_is_feasible(sol, mv)
 
     if compute_cost:
         swap_move_compute_cost(sol, mv, result)
@@ -228,7 +306,6 @@ def swap_predict(sol, mv, require_feasibility=True, compute_cost=True):
     return result
 
 def swap_extended(sol, mv, strategy='if_feasible_and_better'):
-    swap_move_compute_helper(sol, mv)
     result = swap_predict(sol, mv, require_feasibility=True, compute_cost=True)
 
     if strategy == 'always':
@@ -238,11 +315,207 @@ def swap_extended(sol, mv, strategy='if_feasible_and_better'):
     elif strategy == 'if_feasible' and result.feasible:
         swap_move_do(sol, mv)
         return True
-    elif strategy == 'if_better' and result.delta['cost'] < 0 and result.feasible:
+    elif strategy == 'if_better' and result.cost < 0 and result.feasible:
         swap_move_do(sol, mv)
         return True
-    elif strategy == 'if_feasible_and_better' and result.feasible and result.delta['cost'] < 0:
+    elif strategy == 'if_feasible_and_better' and result.feasible and result.cost < 0:
         swap_move_do(sol, mv)
         return True
 
     return False
+
+class SwapBatchResult:
+    # The fields of SwapResult as arrays, plus the helper fields of the moves
+    def __init__(self, n):
+        self.helper = {}
+        self.feasible = np.zeros(n, dtype=bool)
+        self.room_capacity_cost = np.zeros(n, dtype=int)
+        self.min_working_days_cost = np.zeros(n, dtype=int)
+        self.curriculum_compactness_cost = np.zeros(n, dtype=int)
+        self.room_stability_cost = np.zeros(n, dtype=int)
+        self.cost = np.zeros(n, dtype=int)
+
+def swap_batch_compute_helper(sol, l1, r2, d2, s2):
+    """
+    Vectorized swap_move_compute_helper: returns the helper fields of all the
+    moves (l1[i], r2[i], d2[i], s2[i]) as arrays. Empty target cells have
+    l2 = c2 = -1.
+    """
+    model = sol.model
+    l2 = sol.l_rds[(r2 * sol.D + d2) * sol.S + s2].astype(int)
+    return {
+        'c1': model.lecture_course[l1],
+        'r1': sol.lecture_r[l1].astype(int),
+        'd1': sol.lecture_d[l1].astype(int),
+        's1': sol.lecture_s[l1].astype(int),
+        'l2': l2,
+        'c2': np.where(l2 >= 0, model.lecture_course[l2], -1)
+    }
+
+def _batch_curricula(sol, c1, c2):
+    # Curricula of c1 not shared with c2 and vice versa, as (n, k) index arrays
+    # padded with -1
+    table = sol.model.course_curricula_table
+    q1 = table[c1]
+    q2 = np.where((c2 >= 0)[:, None], table[c2], -1)
+    shared1 = (q1[:, :, None] == q2[:, None, :]).any(axis=2)
+    shared2 = (q2[:, :, None] == q1[:, None, :]).any(axis=2)
+    return np.where(shared1, -1, q1), np.where(shared2, -1, q2)
+
+def _batch_compactness_delta(sol, qs, d_from, s_from, d_to, s_to):
+    # Vectorized compactness delta of the curricula qs when one of their
+    # lectures moves from (d_from, s_from) to (d_to, s_to); qs holds the
+    # affected curricula of each move, padded with -1
+    isolated = np.asarray(sol.model.isolated_by_mask)
+    valid = qs >= 0
+    q = np.where(valid, qs, 0)
+    d_from, s_from = d_from[:, None], s_from[:, None]
+    d_to, s_to = d_to[:, None], s_to[:, None]
+
+    before_from = sol.slots_qd[q, d_from]
+    after_from = np.where(sol.sum_qds[q, d_from, s_from] == 1, before_from & ~(1 << s_from), before_from)
+    before_to = np.where(d_from == d_to, after_from, sol.slots_qd[q, d_to])
+    after_to = before_to | (1 << s_to)
+
+    delta = np.where(
+        d_from == d_to,
+        isolated[after_to] - isolated[before_from],
+        isolated[after_from] - isolated[before_from] + isolated[after_to] - isolated[before_to]
+    )
+    return np.sum(np.where(valid, delta, 0), axis=1)
+
+def _batch_working_days_delta(sol, c, d_from, d_to):
+    # Vectorized min working days delta of course c moving one lecture between days
+    model = sol.model
+    cc = np.where(c >= 0, c, 0)
+    before = sol.working_days_c[cc]
+    after = before - (sol.sum_cd[cc, d_from] == 1) + (sol.sum_cd[cc, d_to] == 0)
+    required = model.course_min_working_days[cc]
+    delta = np.maximum(0, required - after) - np.maximum(0, required - before)
+    return np.where((c >= 0) & (d_from != d_to), delta, 0)
+
+def _batch_room_stability_delta(sol, c, r_from, r_to):
+    # Vectorized room stability delta of course c moving one lecture between rooms
+    cc = np.where(c >= 0, c, 0)
+    before = sol.used_rooms_c[cc]
+    after = before - (sol.sum_cr[cc, r_from] == 1) + (sol.sum_cr[cc, r_to] == 0)
+    delta = np.maximum(0, after - 1) - np.maximum(0, before - 1)
+    return np.where((c >= 0) & (r_from != r_to), delta, 0)
+
+def swap_batch_compute_cost(sol, r2, d2, s2, helper, result):
+    c1, r1, d1, s1, c2 = helper['c1'], helper['r1'], helper['d1'], helper['s1'], helper['c2']
+    effective = c1 != c2
+    has_c2 = c2 >= 0
+    cc2 = np.where(has_c2, c2, 0)
+    excess = sol.model.capacity_excess_cr
+
+    room_capacity_cost = (
+        excess[c1, r2] - excess[c1, r1] +
+        np.where(has_c2, excess[cc2, r1] - excess[cc2, r2], 0)
+    ) * ROOM_CAPACITY_COST_FACTOR
+
+    min_working_days_cost = (
+        _batch_working_days_delta(sol, c1, d1, d2) +
+        _batch_working_days_delta(sol, c2, d2, d1)
+    ) * MIN_WORKING_DAYS_COST_FACTOR
+
+    room_stability_cost = (
+        _batch_room_stability_delta(sol, c1, r1, r2) +
+        _batch_room_stability_delta(sol, c2, r2, r1)
+    ) * ROOM_STABILITY_COST_FACTOR
+
+    q1, q2 = _batch_curricula(sol, c1, c2)
+    curriculum_compactness_cost = (
+        _batch_compactness_delta(sol, q1, d1, s1, d2, s2) +
+        _batch_compactness_delta(sol, q2, d2, s2, d1, s1)
+    ) * CURRICULUM_COMPACTNESS_COST_FACTOR
+    moved = (d1 != d2) | (s1 != s2)
+
+    result.room_capacity_cost = np.where(effective, room_capacity_cost, 0)
+    result.min_working_days_cost = np.where(effective, min_working_days_cost, 0)
+    result.room_stability_cost = np.where(effective, room_stability_cost, 0)
+    result.curriculum_compactness_cost = np.where(effective & moved, curriculum_compactness_cost, 0)
+    result.cost = (
+        result.room_capacity_cost +
+        result.min_working_days_cost +
+        result.room_stability_cost +
+        result.curriculum_compactness_cost
+    )
+
+def swap_batch_is_feasible(sol, r2, d2, s2, helper):
+    """
+    Vectorized swap_move_is_feasible: the conflict and unavailability counts
+    after each move are derived from the counters of the two touched cells.
+    """
+    model = sol.model
+    c1, r1, d1, s1, c2 = helper['c1'], helper['r1'], helper['d1'], helper['s1'], helper['c2']
+    effective = c1 != c2
+    has_c2 = c2 >= 0
+    cc2 = np.where(has_c2, c2, 0)
+    moved = effective & ((d1 != d2) | (s1 != s2))
+
+    # Rooms: a swap with another lecture leaves room occupancy unchanged
+    conflicts = np.where(
+        effective & ~has_c2,
+        (sol.sum_rds[r2, d2, s2] > 0).astype(int) - (sol.sum_rds[r1, d1, s1] > 1),
+        0
+    )
+
+    # Teachers
+    t1 = model.course_teacher[c1]
+    t2 = np.where(has_c2, model.course_teacher[cc2], -1)
+    teacher_conflicts = (sol.sum_tds[t1, d2, s2] > 0).astype(int) - (sol.sum_tds[t1, d1, s1] > 1)
+    tt2 = np.where(has_c2, t2, 0)
+    teacher_conflicts += np.where(
+        has_c2,
+        (sol.sum_tds[tt2, d1, s1] > 0).astype(int) - (sol.sum_tds[tt2, d2, s2] > 1),
+        0
+    )
+    conflicts += np.where(moved & (t1 != t2), teacher_conflicts, 0)
+
+    # Curricula shared by both courses keep their occupancy
+    q1, q2 = _batch_curricula(sol, c1, c2)
+    curriculum_conflicts = 0
+    for qs, d_from, s_from, d_to, s_to in ((q1, d1, s1, d2, s2), (q2, d2, s2, d1, s1)):
+        valid = qs >= 0
+        q = np.where(valid, qs, 0)
+        change = ((sol.sum_qds[q, d_to[:, None], s_to[:, None]] > 0).astype(int) -
+                  (sol.sum_qds[q, d_from[:, None], s_from[:, None]] > 1))
+        curriculum_conflicts = curriculum_conflicts + np.sum(np.where(valid, change, 0), axis=1)
+    conflicts += np.where(moved, curriculum_conflicts, 0)
+
+    # Availabilities
+    available = model.availability_cds
+    unavailable = (available[c1, d1, s1].astype(int) - available[c1, d2, s2] +
+                   np.where(has_c2, available[cc2, d2, s2].astype(int) - available[cc2, d1, s1], 0))
+    unavailable = np.where(moved, unavailable, 0)
+
+    return ((sol.n_assigned == sol.L) &
+            (sol.n_conflicts + conflicts == 0) &
+            (sol.n_unavailable + unavailable == 0))
+
+def swap_predict_batch(sol, l1, r2, d2, s2, require_feasibility=True, compute_cost=True):
+    """
+    Evaluate many swap moves at once.
+
+    Args:
+        sol: Solution the moves are evaluated against (it is not modified)
+        l1, r2, d2, s2: Integer arrays describing the moves, as in SwapMove
+        require_feasibility: Compute the feasible flag of every move
+        compute_cost: Compute the per-component cost delta of every move
+
+    Returns:
+        SwapBatchResult whose helper, feasible and cost fields are arrays
+        aligned with the input moves
+    """
+    l1, r2, d2, s2 = (np.asarray(a, dtype=int) for a in (l1, r2, d2, s2))
+    result = SwapBatchResult(len(l1))
+    result.helper = swap_batch_compute_helper(sol, l1, r2, d2, s2)
+
+    if require_feasibility:
+        result.feasible = swap_batch_is_feasible(sol, r2, d2, s2, result.helper)
+
+    if compute_cost:
+        swap_batch_compute_cost(sol, r2, d2, s2, result.helper, result)
+
+    return result
@@ -0,0 +1,106 @@
+import numpy as np
+
+class TabuSearchParams:
+    def __init__(self,
+                 tenure=10,
+                 tenure_random=10,
+                 n_candidates=50):
+        """
+        Parameters for tabu search
+
+        Args:
+            tenure: Minimum number of iterations a lecture may not go back to
+                the period it left
+            tenure_random: Upper bound of the random part added to tenure
+            n_candidates: Moves sampled and evaluated at each iteration
+        """
+        self.tenure = tenure
+        self.tenure_random = tenure_random
+        self.n_candidates = n_candidates
+
+def tabu_search(state, params, timeout_callback=None, verbose_callback=None, max_moves=None):
+    """
+    Tabu search on the current solution of the state. Each iteration samples
+    n_candidates moves with state.generate_swap_move, evaluates them in O(1)
+    with state.predict_swap_cost and applies the best feasible one, even if
+    worsening, that is not tabu. A lecture moved out of a period may not go
+    back to it for a random tenure; a tabu move is still allowed if it
+    improves the best cost (aspiration).
+
+    Args:
+        state: Solver state containing the model and solutions
+        params: TabuSearchParams instance
+        timeout_callback: Function to check if time limit has been reached
+        verbose_callback: Function to print progress updates
+        max_moves: Number of moves to evaluate (defaults to no limit, in which
+            case timeout_callback ends the search)
+    """
+    sol = state.current_solution
+    rng = state.rng
+    audit_cost = state.config.AUDIT_COST
+    S = state.S
+    state.current_cost = sol.total_cost()
+    if state.current_cost < state.best_cost:
+        state.best_cost = state.current_cost
+        state.best_solution.copy_from(sol)
+
+    # Iteration until which each lecture may not go back to each period
+    tabu_until = np.zeros((state.L, state.D * S), dtype=np.int64)
+    tabu_view = memoryview(tabu_until)
+
+    moves = 0
+    iteration = 0
+    while max_moves is None or moves < max_moves:
+        if timeout_callback and timeout_callback():
+            break
+
+        iteration += 1
+        best_mv, best_result, best_delta = None, None, None
+        for _ in range(params.n_candidates):
+            mv = state.generate_swap_move()
+            result = state.predict_swap_cost(mv, require_feasibility=True)
+            moves += 1
+            if not result.feasible:
+                continue
+
+            delta = result.cost
+            if best_delta is not None and delta >= best_delta:
+                continue
+            if state.current_cost + delta >= state.best_cost:
+                # Not aspirated: both lectures must be allowed in their new periods
+                if tabu_view[mv.l1, mv.d2 * S + mv.s2] > iteration:
+                    continue
+                if mv.l2 >= 0 and tabu_view[mv.l2, mv.d1 * S + mv.s1] > iteration:
+                    continue
+            best_mv, best_result, best_delta = mv, result, delta
+
+        if best_mv is None:
+            continue
+
+        tabu_until[best_mv.l1, best_mv.d1 * S + best_mv.s1] = iteration + params.tenure + rng.randrange(params.tenure_random + 1)
+        if best_mv.l2 >= 0:
+            tabu_until[best_mv.l2, best_mv.d2 * S + best_mv.s2] = iteration + params.tenure + rng.randrange(params.tenure_random + 1)
+        state.apply_swap(best_mv, best_result)
+
+        # Update global best
+        if state.current_cost < state.best_cost:
+            state.best_cost = state.current_cost
+            state.best_solution.copy_from(sol)
+            state.non_improving_best_cycles = 0
+
+            if verbose_callback:
+                verbose_callback(state.move_count + moves, 0, state.current_cost, state.current_cost,
+                                 state.best_cost, 0)
+        else:
+            state.non_improving_best_cycles += 1
+
+        # Periodic reporting
+        if iteration % 1000 == 0:
+            if audit_cost:
+                sol.audit_cost()
+            if verbose_callback:
+                verbose_callback(state.move_count + moves, state.non_improving_best_cycles, state.current_cost,
+                                 state.current_cost, state.best_cost, 0)
+
+    state.move_count += moves
+    return state.best_cost
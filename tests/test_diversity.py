@@ -0,0 +1,59 @@
+import math
+import os
+import random
+from collections import Counter
+
+import pytest
+
+from model_parser import TimetableModel
+from solution import Solution
+from feasible_solution_finder import FeasibleSolutionFinder, FeasibleSolutionFinderConfig
+from diversity import population_diversity
+
+INSTANCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'comp01.ctt')
+
+
+@pytest.fixture(scope='module')
+def population():
+    model = TimetableModel()
+    model.parse(INSTANCE)
+    population = []
+    for seed in range(4):
+        random.seed(seed)
+        solution = Solution(model)
+        assert FeasibleSolutionFinder().find(FeasibleSolutionFinderConfig(), solution)
+        population.append(solution)
+    # A duplicate and a partially assigned individual
+    population.append(population[0].clone())
+    partial = population[1].clone()
+    for l in range(0, partial.L, 7):
+        partial.unassign_lecture(l)
+    population.append(partial)
+    return population
+
+
+def cells(solution):
+    return list(zip(solution.lecture_r.tolist(), solution.lecture_d.tolist(), solution.lecture_s.tolist()))
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 6])
+def test_population_diversity_matches_pairwise_definitions(population, size):
+    population = population[:size]
+    diversity = population_diversity(population)
+    P = len(population)
+    assert diversity.unique == len({tuple(cells(solution)) for solution in population})
+    if P < 2:
+        assert diversity.distance == 0.0 and diversity.entropy == 0.0
+        return
+
+    L = population[0].L
+    assignments = [cells(solution) for solution in population]
+    distances = [sum(a != b for a, b in zip(assignments[i], assignments[j])) / L
+                 for i in range(P) for j in range(i + 1, P)]
+    assert diversity.distance == pytest.approx(sum(distances) / len(distances))
+
+    entropy = 0.0
+    for l in range(L):
+        for count in Counter(assignment[l] for assignment in assignments).values():
+            entropy -= count / P * math.log2(count / P)
+    assert diversity.entropy == pytest.approx(entropy / L)
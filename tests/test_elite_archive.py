@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from elite_archive import EliteArchive
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_elite_archive_matches_a_stable_sort(seed):
+    rng = random.Random(seed)
+    n = rng.randint(1, 20)
+    # A small fitness range gives many ties, ordered by index
+    archive = EliteArchive([rng.randint(0, 10) for _ in range(n)])
+    fitness = list(archive.fitness)
+    for step in range(500):
+        i = rng.randrange(n)
+        fitness[i] = rng.randint(0, 10)
+        archive.update(i, fitness[i])
+
+        order = sorted(range(n), key=lambda j: fitness[j])
+        assert archive.best() == order[0]
+        assert archive.worst() == order[-1]
+        assert archive.best_fitness() == fitness[order[0]]
+        assert archive.worst_fitness() == fitness[order[-1]]
+        k = rng.randint(1, n + 2)
+        assert archive.top(k) == order[:k]
+        assert archive.bottom(k) == order[::-1][:k]
+    # The updates trigger rebuilds, which must not lose individuals
+    assert sorted(archive.top(n)) == list(range(n))
+
+
+def test_elite_archive_counts_duplicates():
+    archive = EliteArchive([3, 1, 2], hashes=[10, 11, 10])
+    assert archive.is_duplicate(10, 0)
+    assert not archive.is_duplicate(11, 1)
+    archive.update(2, 5, zobrist=12)
+    assert not archive.is_duplicate(10, 0)
+    assert archive.is_duplicate(12, 0)
+    assert not archive.is_duplicate(12, 2)
@@ -0,0 +1,96 @@
+import itertools
+import os
+import random
+
+import pytest
+
+from model_parser import TimetableModel
+from solution import Solution
+from feasible_solution_finder import FeasibleSolutionFinder, FeasibleSolutionFinderConfig
+from swap import SwapMove, swap_predict, swap_move_do
+from lower_bound import lower_bound
+
+INSTANCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'comp01.ctt')
+
+# Two days of two periods in a single room that is too small: c1 cannot meet
+# its minimum working days and q2 has a single lecture
+TINY = """Name: Tiny
+Courses: 2
+Rooms: 1
+Days: 2
+Periods_per_day: 2
+Curricula: 2
+Constraints: 1
+
+COURSES:
+c1 t1 2 3 30
+c2 t2 1 1 10
+
+ROOMS:
+r1 20
+
+CURRICULA:
+q1 2 c1 c2
+q2 1 c2
+
+UNAVAILABILITY_CONSTRAINTS:
+c2 1 1
+
+END.
+"""
+
+
+@pytest.fixture(scope='module')
+def model():
+    model = TimetableModel()
+    model.parse(INSTANCE)
+    return model
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_lower_bound_holds_for_feasible_solutions(model, seed):
+    bound = lower_bound(model)
+    assert bound['cost'] == sum(value for key, value in bound.items() if key != 'cost')
+
+    random.seed(seed)
+    sol = Solution(model)
+    assert FeasibleSolutionFinder().find(FeasibleSolutionFinderConfig(), sol)
+    # Check the bound along a descent, where the components get close to it
+    rng = random.Random(seed)
+    for step in range(5000):
+        if step % 500 == 0:
+            components = sol.compute_cost_components()
+            for key, value in bound.items():
+                assert value <= components[key], key
+        mv = SwapMove(rng.randrange(len(model.lectures)), rng.randrange(model.n_rooms),
+                      rng.randrange(model.n_days), rng.randrange(model.n_slots))
+        result = swap_predict(sol, mv)
+        if result.feasible and result.cost <= 0:
+            swap_move_do(sol, mv)
+    assert sol.is_feasible()
+
+
+def test_lower_bound_against_exhaustive_search(tmp_path):
+    path = tmp_path / 'tiny.ctt'
+    path.write_text(TINY)
+    model = TimetableModel()
+    model.parse(str(path))
+    bound = lower_bound(model)
+    assert bound['room_capacity_cost'] > 0
+    assert bound['min_working_days_cost'] > 0
+    assert bound['curriculum_compactness_cost'] > 0
+
+    sol = Solution(model)
+    cells = [(0, d, s) for d in range(model.n_days) for s in range(model.n_slots)]
+    best = None
+    for assignment in itertools.permutations(cells, len(model.lectures)):
+        sol.clear()
+        for l, (r, d, s) in enumerate(assignment):
+            sol.assign_lecture(l, r, d, s)
+        if not sol.satisfy_hard_constraints():
+            continue
+        components = sol.compute_cost_components()
+        best = components if best is None else {key: min(best[key], components[key]) for key in best}
+    assert best is not None
+    for key, value in bound.items():
+        assert value <= best[key], key
@@ -0,0 +1,65 @@
+import itertools
+import os
+import random
+
+import numpy as np
+import pytest
+
+from model_parser import TimetableModel
+from solution import Solution
+from feasible_solution_finder import FeasibleSolutionFinder, FeasibleSolutionFinderConfig
+from room_matching import min_cost_assignment, reassign_rooms
+
+INSTANCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'comp01.ctt')
+
+
+def assignment_cost(cost, assignment):
+    return sum(row[j] for row, j in zip(cost, assignment))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_min_cost_assignment_matches_brute_force(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        n = rng.randint(1, 5)
+        m = rng.randint(n, 6)
+        # Small value ranges give ties, negative values test the potentials
+        cost = [[rng.randint(-5, 10) for _ in range(m)] for _ in range(n)]
+        assignment = min_cost_assignment(cost)
+        assert len(set(assignment)) == n and all(0 <= j < m for j in assignment)
+        best = min(assignment_cost(cost, p) for p in itertools.permutations(range(m), n))
+        assert assignment_cost(cost, assignment) == best
+
+
+def test_reassign_rooms_reaches_the_period_optimum():
+    model = TimetableModel()
+    model.parse(INSTANCE)
+    random.seed(0)
+    sol = Solution(model)
+    assert FeasibleSolutionFinder().find(FeasibleSolutionFinderConfig(), sol)
+
+    checked = 0
+    for d in range(model.n_days):
+        for s in range(model.n_slots):
+            lectures = np.flatnonzero((sol.lecture_d == d) & (sol.lecture_s == s)).tolist()
+            if len(lectures) < 2:
+                continue
+            # Try every assignment of distinct rooms to the lectures of the period
+            best = None
+            for rooms in itertools.permutations(range(model.n_rooms), len(lectures)):
+                sol.begin()
+                for l in lectures:
+                    sol.unassign_lecture(l)
+                for l, r in zip(lectures, rooms):
+                    sol.assign_lecture(l, r, d, s)
+                cost = sol.total_cost()
+                best = cost if best is None else min(best, cost)
+                sol.rollback()
+
+            cost_before = sol.total_cost()
+            assert reassign_rooms(sol, [(d, s)]) == best - cost_before
+            assert sol.total_cost() == best
+            assert sol.is_feasible()
+            assert sol.audit_cost() == best
+            checked += 1
+    assert checked > 0
@@ -0,0 +1,115 @@
+import os
+import random
+
+import numpy as np
+
+from model_parser import TimetableModel
+from solution import SolutionPool, SOLUTION_SCALARS, solution_layout
+from feasible_solution_finder import FeasibleSolutionFinder, FeasibleSolutionFinderConfig
+from swap import SwapMove, swap_move_compute_helper, swap_move_do
+from compound_moves import compound_move_extended
+from crossover import transplant
+
+COMP01 = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'comp01.ctt')
+
+# One lecture, one room-slot and no curricula: the state arrays of a solution
+# take 30 bytes
+INSTANCE = """Name: Tiny
+Courses: 1
+Rooms: 1
+Days: 1
+Periods_per_day: 1
+Curricula: 0
+Constraints: 0
+
+COURSES:
+c1 t1 1 1 10
+
+ROOMS:
+r1 20
+
+CURRICULA:
+
+UNAVAILABILITY_CONSTRAINTS:
+
+END.
+"""
+
+
+def test_pooled_solutions_are_aligned(tmp_path):
+    path = tmp_path / 'tiny.ctt'
+    path.write_text(INSTANCE)
+    model = TimetableModel()
+    model.parse(str(path))
+    assert solution_layout(model)[1] % 8 == 0
+
+    pool = SolutionPool(model, 3)
+    for _ in range(3):
+        solution = pool.acquire()
+        for name, dtype, shape, fill, offset in solution.layout:
+            assert getattr(solution, name).flags.aligned, name
+        # Scalar reads through the memoryviews fail on unaligned arrays
+        assert solution.empty_cells_view[0] == 0
+
+
+def snapshot(solution):
+    state = {name: getattr(solution, name).copy() for name, dtype, shape, fill, offset in solution.layout}
+    # Only the set of empty cells is restored, not their order
+    state['empty_cells'] = np.sort(solution.empty_cells[:solution.n_empty])
+    del state['empty_pos']
+    state.update((name, getattr(solution, name)) for name in SOLUTION_SCALARS)
+    state['components'] = solution.compute_cost_components()
+    return state
+
+
+def assert_restored(solution, state):
+    current = snapshot(solution)
+    for name, value in state.items():
+        if isinstance(value, np.ndarray):
+            assert np.array_equal(current[name], value), name
+        else:
+            assert current[name] == value, name
+    cells = solution.empty_cells[:solution.n_empty]
+    assert np.array_equal(solution.empty_pos[cells], np.arange(solution.n_empty))
+    assert solution.audit_cost() == state['components']['cost']
+
+
+def perturb(solution, ref, rng):
+    model = solution.model
+    for _ in range(30):
+        mv = SwapMove(rng.randrange(len(model.lectures)), rng.randrange(model.n_rooms),
+                      rng.randrange(model.n_days), rng.randrange(model.n_slots))
+        if rng.random() < 0.5:
+            swap_move_compute_helper(solution, mv)
+            swap_move_do(solution, mv)
+        else:
+            compound_move_extended(solution, mv, strategy='if_feasible')
+    transplant(solution, ref, rng.sample(range(len(model.courses)), 3))
+
+
+def test_rollback_restores_the_state_exactly():
+    model = TimetableModel()
+    model.parse(COMP01)
+    random.seed(0)
+    solution = SolutionPool(model, 2).acquire()
+    assert FeasibleSolutionFinder().find(FeasibleSolutionFinderConfig(), solution)
+    ref = solution.clone()
+    ref.clear()
+    random.seed(1)
+    assert FeasibleSolutionFinder().find(FeasibleSolutionFinderConfig(), ref)
+    rng = random.Random(0)
+
+    for _ in range(5):
+        before = snapshot(solution)
+        solution.begin()
+        perturb(solution, ref, rng)
+        middle = snapshot(solution)
+        savepoint = solution.savepoint()
+        assert savepoint > 0
+        perturb(solution, ref, rng)
+        solution.rollback(savepoint)
+        assert_restored(solution, middle)
+        perturb(solution, ref, rng)
+        solution.rollback()
+        assert solution.undo_log is None
+        assert_restored(solution, before)
@@ -0,0 +1,148 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+from model_parser import TimetableModel
+from solution import Solution
+from feasible_solution_finder import FeasibleSolutionFinder, FeasibleSolutionFinderConfig
+from swap import SwapMove, swap_predict, swap_move_do, swap_predict_batch
+
+INSTANCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'comp01.ctt')
+
+COMPONENTS = ['room_capacity_cost', 'min_working_days_cost', 'curriculum_compactness_cost', 'room_stability_cost']
+
+
+@pytest.fixture(scope='module')
+def model():
+    model = TimetableModel()
+    model.parse(INSTANCE)
+    return model
+
+
+def feasible_solution(model, seed):
+    random.seed(seed)
+    sol = Solution(model)
+    assert FeasibleSolutionFinder().find(FeasibleSolutionFinderConfig(), sol)
+    return sol
+
+
+def random_move(model, rng):
+    return SwapMove(rng.randrange(len(model.lectures)), rng.randrange(model.n_rooms),
+                    rng.randrange(model.n_days), rng.randrange(model.n_slots))
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_swap_delta_matches_full_recompute(model, seed):
+    # The incremental delta of every component equals the difference of the
+    # costs recomputed from scratch before and after the move
+    sol = feasible_solution(model, seed)
+    rng = random.Random(seed)
+    for _ in range(300):
+        mv = random_move(model, rng)
+        result = swap_predict(sol, mv)
+        assert result.feasible == sol.satisfy_hard_constraints_after_swap(mv)
+
+        before = sol.compute_cost_components()
+        after_sol = sol.clone()
+        swap_move_do(after_sol, mv)
+        after = after_sol.compute_cost_components()
+        for key in COMPONENTS:
+            assert getattr(result, key) == after[key] - before[key], key
+        assert result.cost == after['cost'] - before['cost']
+        assert after_sol.audit_cost() == after['cost']
+        after_sol.release()
+
+
+def test_swap_delta_along_a_walk(model):
+    # Apply the feasible moves so that the counters the deltas read from
+    # drift away from the constructed solution
+    sol = feasible_solution(model, 3)
+    rng = random.Random(3)
+    cost = sol.compute_total_cost()
+    applied = 0
+    for _ in range(2000):
+        mv = random_move(model, rng)
+        result = swap_predict(sol, mv)
+        if not result.feasible:
+            continue
+        swap_move_do(sol, mv)
+        cost += result.cost
+        applied += 1
+        assert sol.audit_cost() == cost
+    assert applied > 0
+    assert sol.satisfy_hard_constraints()
+
+
+@pytest.fixture(scope='module')
+def model_without_curricula(tmp_path_factory):
+    # comp01 with its curricula section emptied
+    lines = open(INSTANCE).read().splitlines()
+    start, end = lines.index('CURRICULA:'), lines.index('UNAVAILABILITY_CONSTRAINTS:')
+    lines = ['Curricula: 0' if line.startswith('Curricula:') else line
+             for line in lines[:start + 1] + [''] + lines[end:]]
+    path = tmp_path_factory.mktemp('instances') / 'comp01_no_curricula.ctt'
+    path.write_text('\n'.join(lines) + '\n')
+    model = TimetableModel()
+    model.parse(str(path))
+    assert len(model.curriculas) == 0
+    return model
+
+
+def check_batch_matches_scalar(model, seed):
+    sol = feasible_solution(model, seed)
+    rng = np.random.default_rng(seed)
+    n = 2000
+    l1 = rng.integers(0, len(model.lectures), n)
+    r2 = rng.integers(0, model.n_rooms, n)
+    d2 = rng.integers(0, model.n_days, n)
+    s2 = rng.integers(0, model.n_slots, n)
+    # Include moves onto the lecture's own cell and onto occupied cells
+    l1[:50] = np.arange(50)
+    r2[:50] = sol.lecture_r[:50]
+    d2[:50] = sol.lecture_d[:50]
+    s2[:50] = sol.lecture_s[:50]
+    occupied = np.flatnonzero(sol.lecture_r >= 0)[:100]
+    r2[50:150] = sol.lecture_r[occupied]
+    d2[50:150] = sol.lecture_d[occupied]
+    s2[50:150] = sol.lecture_s[occupied]
+
+    batch = swap_predict_batch(sol, l1, r2, d2, s2)
+    for i in range(n):
+        result = swap_predict(sol, SwapMove(int(l1[i]), int(r2[i]), int(d2[i]), int(s2[i])))
+        assert bool(batch.feasible[i]) == result.feasible, i
+        for key in COMPONENTS + ['cost']:
+            assert int(getattr(batch, key)[i]) == getattr(result, key), (i, key)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_swap_predict_batch_matches_scalar(model, seed):
+    check_batch_matches_scalar(model, seed)
+
+
+def test_swap_predict_batch_without_curricula(model_without_curricula):
+    check_batch_matches_scalar(model_without_curricula, 0)
+
+
+def test_swap_feasibility_on_infeasible_solutions(model):
+    # Walk through conflicting moves, so that the check also runs on
+    # counters above one, then on a partially assigned solution
+    sol = feasible_solution(model, 4)
+    rng = random.Random(4)
+    infeasible = 0
+    for _ in range(1000):
+        mv = random_move(model, rng)
+        assert swap_predict(sol, mv).feasible == sol.satisfy_hard_constraints_after_swap(mv)
+        if rng.random() < 0.2:
+            swap_move_do(sol, mv)
+        infeasible += not sol.satisfy_hard_constraints()
+    assert infeasible > 0
+
+    for l in rng.sample(range(len(model.lectures)), 5):
+        sol.unassign_lecture(l)
+    for _ in range(200):
+        mv = random_move(model, rng)
+        if sol.lecture_r[mv.l1] < 0:
+            continue
+        assert swap_predict(sol, mv).feasible == sol.satisfy_hard_constraints_after_swap(mv)